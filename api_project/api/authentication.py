@@ -0,0 +1,92 @@
+# api/authentication.py
+"""Token authentication with a cache in front of the token lookup.
+
+``TokenAuthentication`` joins ``authtoken_token`` to the user table on every
+request. ``CachedTokenAuthentication`` keeps the resolved user's fields in
+the ``AUTH_TOKEN_CACHE`` cache for ``AUTH_TOKEN_CACHE_TIMEOUT`` seconds. The
+signal handlers in ``api/signals.py`` drop entries when a token is deleted
+or its user is saved (which covers deactivation).
+
+Cache keys are a SHA-256 of the token, and entries leave out
+``CACHE_EXCLUDED_FIELDS`` (the password hash), so a shared cache server never
+holds credentials. A user rebuilt from the cache has those fields deferred:
+reading one loads it, and ``save()`` only writes the fields that were loaded.
+
+Hits and misses are counted in the same cache, so ``token_cache_stats`` (and
+the ``token_cache_stats`` command) report them across all workers.
+"""
+import hashlib
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.db.models.fields.files import FieldFile
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+CACHE_EXCLUDED_FIELDS = ('password',)
+
+STATS = ('hits', 'misses')
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE', 'default')]
+
+
+def _key(token_key):
+    return 'auth_token:' + hashlib.sha256(token_key.encode()).hexdigest()
+
+
+def _pack(user, token):
+    fields = {}
+    for field in user._meta.concrete_fields:
+        if field.attname in CACHE_EXCLUDED_FIELDS:
+            continue
+        value = getattr(user, field.attname)
+        if isinstance(value, FieldFile):
+            # A FieldFile pickles its model instance; the stored name is enough.
+            value = value.name
+        fields[field.attname] = value
+    return {'fields': fields, 'created': token.created}
+
+
+def _unpack(cached, token_key):
+    User = get_user_model()
+    fields = cached['fields']
+    user = User.from_db(router.db_for_read(User), list(fields), list(fields.values()))
+    return user, Token(key=token_key, user=user, created=cached['created'])
+
+
+def _count(name):
+    cache = _cache()
+    key = f'auth_token:stats:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The first count (or evicted); a concurrent first count may be lost.
+        cache.add(key, 1, None)
+
+
+def token_cache_stats():
+    """Hit/miss counts so far, across all workers sharing the cache."""
+    counts = _cache().get_many([f'auth_token:stats:{name}' for name in STATS])
+    return {name: counts.get(f'auth_token:stats:{name}', 0) for name in STATS}
+
+
+def invalidate_tokens(keys):
+    keys = list(keys)
+    if keys:
+        _cache().delete_many([_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache = _cache()
+        cached = cache.get(_key(key))
+        if cached is not None and cached['fields'].get('is_active', True):
+            _count('hits')
+            return _unpack(cached, key)
+        _count('misses')
+        user, token = super().authenticate_credentials(key)
+        cache.set(_key(key), _pack(user, token), getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300))
+        return user, token
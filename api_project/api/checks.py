@@ -0,0 +1,23 @@
+# api/checks.py
+"""Deployment check for the token cache, which must be shared between worker
+processes: with a local-memory cache, a deleted token or deactivated user is
+only dropped from the worker that handled the change.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches, deploy=True)
+def check_token_cache(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    alias = getattr(settings, 'AUTH_TOKEN_CACHE', 'default')
+    if settings.CACHES.get(alias, {}).get('BACKEND') in LOCAL_BACKENDS:
+        return [Error(
+            f"AUTH_TOKEN_CACHE uses the local-memory cache {alias!r}, which is not shared between workers.",
+            hint='Set CACHE_URL (redis://... or memcached://...) or point the alias at a shared backend.',
+            id='api.E001',
+        )]
+    return []
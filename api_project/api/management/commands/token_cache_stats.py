@@ -0,0 +1,11 @@
+# api/management/commands/token_cache_stats.py
+from django.core.management.base import BaseCommand
+from api import authentication
+
+
+class Command(BaseCommand):
+    help = 'Print token cache hits and misses (shared across workers).'
+
+    def handle(self, *args, **options):
+        for name, count in authentication.token_cache_stats().items():
+            self.stdout.write(f'{name}: {count}')
@@ -0,0 +1,19 @@
+# api/signals.py
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def drop_tokens_of_saved_user(sender, instance, created, **kwargs):
+    # Cached entries hold a copy of the user, so any save (deactivation,
+    # password or profile change) makes them stale.
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
@@ -1,3 +1,72 @@
-from django.test import TestCase
+# api/tests.py
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from . import authentication, checks
+from .models import Book
 
-# Create your tests here.
+
+class TokenCacheCheckTests(APITestCase):
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_local_memory_cache_fails_deploy_check(self):
+        """A local-memory token cache is rejected by the deploy check."""
+        self.assertEqual([error.id for error in checks.check_token_cache(None)], ['api.E001'])
+
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                                                        'LOCATION': 'redis://localhost:6379/0'}})
+    def test_shared_cache_passes_deploy_check(self):
+        """A shared token cache passes."""
+        self.assertEqual(checks.check_token_cache(None), [])
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        """Create a user with a token and a book to list."""
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='testpass')
+        self.token = Token.objects.create(user=self.user).key
+        Book.objects.create(title='Dune', author='Frank Herbert')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_second_request_skips_token_query(self):
+        """After the first lookup, the token is resolved from the cache."""
+        self.client.get(reverse('book_all-list'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('book_all-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cache_holds_no_credentials(self):
+        """Entries are keyed by a hash of the token and leave out the password hash."""
+        self.client.get(reverse('book_all-list'))
+        entry = cache.get(authentication._key(self.token))
+        self.assertNotIn(self.token, authentication._key(self.token) + repr(entry))
+        self.assertNotIn('password', entry['fields'])
+
+    def test_deactivated_user_is_rejected(self):
+        """Deactivating the user drops the cached token."""
+        self.client.get(reverse('book_all-list'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('book_all-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        """Deleting the token drops the cached entry."""
+        self.client.get(reverse('book_all-list'))
+        Token.objects.filter(key=self.token).delete()
+        response = self.client.get(reverse('book_all-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_command_reports_shared_counts(self):
+        """Hits and misses are counted in the cache and printed by token_cache_stats."""
+        for _ in range(3):
+            self.client.get(reverse('book_all-list'))
+        out = StringIO()
+        call_command('token_cache_stats', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), ['hits: 2', 'misses: 1'])
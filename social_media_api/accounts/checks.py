@@ -0,0 +1,30 @@
+# accounts/checks.py
+"""Deployment checks for state that must be shared between worker processes.
+
+The follow-graph cache, token cache, rate-limit counters, replica
+stickiness and live notification signals all rely on a cache every worker
+sees; a local-memory cache silently makes each of them per-process.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+SHARED_CACHE_SETTINGS = ('FOLLOW_GRAPH_CACHE', 'AUTH_TOKEN_CACHE', 'RATE_LIMIT_CACHE', 'DATABASE_STICKY_CACHE',
+                         'NOTIFICATIONS_STREAM_CACHE')
+LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    errors = []
+    for name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, name, 'default')
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in LOCAL_BACKENDS:
+            errors.append(Error(
+                f"{name} uses the local-memory cache {alias!r}, which is not shared between workers.",
+                hint='Set CACHE_URL (redis://... or memcached://...) or point the alias at a shared backend.',
+                id='accounts.E001',
+            ))
+    return errors
@@ -0,0 +1,72 @@
+# accounts/export.py
+"""Streaming NDJSON export of a user's posts, comments and likes.
+
+Rows are read with ``QuerySet.iterator()`` in ``EXPORT_CHUNK_SIZE`` chunks and
+written one JSON object per line, so memory stays flat however much history
+the user has. Under ASGI, Django would collect a sync iterator into a list
+before sending it, so ``async_chunks`` wraps the stream and pulls one chunk
+at a time in the thread that holds the cursor.
+"""
+import zlib
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from posts.models import Comment, Like, Post
+
+SECTIONS = (
+    ('post', Post, ('id', 'title', 'content', 'created_at', 'updated_at', 'likes_count'), 'author'),
+    ('comment', Comment, ('id', 'post_id', 'content', 'created_at', 'updated_at'), 'author'),
+    ('like', Like, ('id', 'post_id', 'created_at'), 'user'),
+)
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def export_lines(user):
+    """Yield one encoded NDJSON line per exported row."""
+    encoder = DjangoJSONEncoder()
+    for kind, model, fields, owner in SECTIONS:
+        rows = model.objects.filter(**{owner: user}).order_by('id').values(*fields)
+        for row in rows.iterator(chunk_size=chunk_size()):
+            row['type'] = kind
+            yield (encoder.encode(row) + '\n').encode()
+
+
+def buffered(lines, size=64 * 1024):
+    """Group small lines into ~``size`` byte chunks to cut per-write overhead."""
+    buffer = []
+    length = 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(user, compress=False):
+    chunks = buffered(export_lines(user))
+    return gzipped(chunks) if compress else chunks
+
+
+async def async_chunks(chunks):
+    """Async iterator over ``chunks``, advancing it in the sync thread that owns the database connection."""
+    step = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await step(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
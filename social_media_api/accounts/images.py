@@ -0,0 +1,129 @@
+# accounts/images.py
+"""Profile picture variants.
+
+After an upload is committed, ``schedule_variants`` hands the file to a small
+thread pool that writes resized, recompressed copies (``AVATAR_SIZES``) and
+records their storage names in ``CustomUser.profile_picture_variants``. With
+``AVATAR_WORKERS = 0`` the variants are generated inline instead.
+
+Variants live under ``profiles/variants/<user id>/``, named after a digest of
+the original's storage name, so they can never collide with another user's
+upload. Existing files are never overwritten: whatever name the storage hands
+back is the one recorded. A replaced picture's variants are deleted once the
+new picture is committed.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = {'thumbnail': 64, 'small': 128, 'medium': 256}
+
+_executor = None
+
+
+def avatar_sizes():
+    return getattr(settings, 'AVATAR_SIZES', DEFAULT_SIZES)
+
+
+def avatar_workers():
+    return getattr(settings, 'AVATAR_WORKERS', 2)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=avatar_workers(), thread_name_prefix='avatars')
+    return _executor
+
+
+def variant_name(user_id, original, label):
+    digest = hashlib.sha256(original.encode()).hexdigest()[:16]
+    return f"profiles/variants/{user_id}/{digest}_{label}.{getattr(settings, 'AVATAR_FORMAT', 'WEBP').lower()}"
+
+
+def delete_variants(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.exception('Could not delete avatar variant %s', name)
+
+
+def render_variant(image, size):
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.LANCZOS)
+    buffer = BytesIO()
+    variant.save(buffer, format=getattr(settings, 'AVATAR_FORMAT', 'WEBP'),
+                 quality=getattr(settings, 'AVATAR_QUALITY', 80))
+    return buffer.getvalue()
+
+
+def generate_variants(user_id, original):
+    """Write every size of ``original`` and store their names on the user.
+
+    If the user has uploaded a different picture in the meantime, the new
+    files are deleted again and the user is left alone.
+    """
+    with default_storage.open(original, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        variants = {}
+        for label, size in avatar_sizes().items():
+            name = variant_name(user_id, original, label)
+            variants[label] = default_storage.save(name, ContentFile(render_variant(image, size)))
+    updated = get_user_model().objects.filter(pk=user_id, profile_picture=original).update(
+        profile_picture_variants=variants
+    )
+    if not updated:
+        delete_variants(variants.values())
+        return {}
+    invalidate_tokens(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+    return variants
+
+
+def _run(user_id, original):
+    close_old_connections()
+    try:
+        generate_variants(user_id, original)
+    except Exception:
+        logger.exception('Could not generate avatar variants for user %s', user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(user):
+    """Queue variant generation for ``user``'s current picture once the transaction commits."""
+    if not user.profile_picture:
+        return
+    user_id, original = user.pk, user.profile_picture.name
+    if avatar_workers():
+        transaction.on_commit(lambda: _get_executor().submit(_run, user_id, original))
+    else:
+        transaction.on_commit(lambda: generate_variants(user_id, original))
+
+
+def discard_variants(variants):
+    """Delete ``variants`` (label -> name) once the transaction replacing them commits."""
+    names = list((variants or {}).values())
+    if names:
+        transaction.on_commit(lambda: delete_variants(names))
+
+
+def variant_urls(user, request=None):
+    urls = {}
+    for label, name in (user.profile_picture_variants or {}).items():
+        url = default_storage.url(name)
+        urls[label] = request.build_absolute_uri(url) if request is not None else url
+    return urls
@@ -0,0 +1,29 @@
+# accounts/management/commands/export_user_data.py
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from accounts import export
+
+
+class Command(BaseCommand):
+    help = "Write a user's posts, comments and likes as NDJSON (optionally gzipped)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output', '-o', help='File to write; stdout if omitted.')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Unknown user {options['username']}")
+        out = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in export.export_stream(user, compress=options['gzip']):
+                out.write(chunk)
+        finally:
+            if options['output']:
+                out.close()
+            else:
+                out.flush()
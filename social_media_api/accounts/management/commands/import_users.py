@@ -0,0 +1,78 @@
+# accounts/management/commands/import_users.py
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from accounts import bulk_import
+
+
+class Command(BaseCommand):
+    help = ('Create users and auth tokens from a CSV or NDJSON file, hashing passwords in a '
+            'process pool. Existing usernames are skipped; --checkpoint makes an interrupted '
+            'import resume where it stopped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Password hashing processes; 0 hashes in this process.')
+        parser.add_argument('--checkpoint', help='File recording how many records have been imported.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('csv' if options['path'].endswith('.csv') else 'ndjson')
+        done = self.read_checkpoint(options['checkpoint'])
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        executor = None
+        if options['workers']:
+            executor = ProcessPoolExecutor(max_workers=options['workers'], initializer=bulk_import.init_worker)
+        created = skipped = failed = 0
+        started = time.monotonic()
+        try:
+            records = bulk_import.read_records(stream, fmt)
+            if done:
+                self.stdout.write(f'Resuming after {done} records')
+                records = islice(records, done, None)
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+                chunk_created, chunk_skipped, errors = bulk_import.import_chunk(chunk, executor)
+                created += chunk_created
+                skipped += chunk_skipped
+                failed += len(errors)
+                for line_number, message in errors:
+                    self.stderr.write(f'line {line_number}: {message}')
+                done += len(chunk)
+                self.write_checkpoint(options['checkpoint'], done)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'{done} records: {created} created, {skipped} existing, {failed} invalid '
+                                  f'({created / elapsed:.0f} users/s)')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} users in {elapsed:.1f}s ({created / elapsed if elapsed else 0:.0f} users/s); '
+            f'{skipped} already existed, {failed} invalid'
+        ))
+
+    def read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as handle:
+            try:
+                return int(handle.read().strip() or 0)
+            except ValueError:
+                raise CommandError(f'Unreadable checkpoint {path}')
+
+    def write_checkpoint(self, path, done):
+        if not path:
+            return
+        with open(f'{path}.tmp', 'w') as handle:
+            handle.write(str(done))
+        os.replace(f'{path}.tmp', path)
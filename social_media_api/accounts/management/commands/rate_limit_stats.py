@@ -0,0 +1,11 @@
+# accounts/management/commands/rate_limit_stats.py
+from django.core.management.base import BaseCommand
+from accounts import throttling
+
+
+class Command(BaseCommand):
+    help = 'Print how many requests each rate-limit scope has rejected (shared across workers).'
+
+    def handle(self, *args, **options):
+        for scope, count in throttling.rejection_counts().items():
+            self.stdout.write(f'{scope}: {count}')
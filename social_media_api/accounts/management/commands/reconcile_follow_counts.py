@@ -0,0 +1,39 @@
+# accounts/management/commands/reconcile_follow_counts.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from accounts.models import counted_followers, counted_following, recount_follows
+
+
+class Command(BaseCommand):
+    help = 'Recompute followers_count/following_count from follow rows and fix any that have drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users checked per batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            ids = list(User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+            drifted = (
+                User.objects.filter(id__in=ids)
+                .annotate(actual_followers=counted_followers(), actual_following=counted_following())
+                .filter(~Q(followers_count=F('actual_followers')) | ~Q(following_count=F('actual_following')))
+                .values_list('id', flat=True)
+            )
+            if options['dry_run']:
+                fixed += drifted.count()
+            else:
+                # Count and write in the same UPDATE, so a follow landing between
+                # a separate read and write can't be overwritten.
+                fixed += recount_follows(drifted)
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} users. {action} {fixed} drifted counters.'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:06
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_follow_counts(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    counted = CustomUser.objects.annotate(n_followers=Count('followers', distinct=True),
+                                          n_following=Count('following', distinct=True))
+    for user in counted.iterator():
+        if user.n_followers or user.n_following:
+            CustomUser.objects.filter(pk=user.pk).update(followers_count=user.n_followers,
+                                                         following_count=user.n_following)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_follow_counts, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,67 @@
 # accounts/models.py
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from . import follow_graph
 
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # Storage names of the resized copies of profile_picture, by size label (accounts/images.py).
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     followers = models.ManyToManyField('self', symmetrical=False, related_name='following', blank=True)
+    # Denormalized sizes of the two sides of ``followers``, kept in step by
+    # follow()/unfollow(); other changes recount them (accounts/signals.py).
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+    def follow(self, other):
+        """Make this user follow ``other``. Returns False if they already did."""
+        Follow = CustomUser.followers.through
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(from_customuser=other, to_customuser=self)
+            if created:
+                CustomUser.objects.filter(pk=self.pk).update(following_count=F('following_count') + 1)
+                CustomUser.objects.filter(pk=other.pk).update(followers_count=F('followers_count') + 1)
+                follow_graph.invalidate(self.pk, other.pk)
+        return created
+
+    def unfollow(self, other):
+        """Stop following ``other``. Returns False if this user was not following them."""
+        Follow = CustomUser.followers.through
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(from_customuser=other, to_customuser=self).delete()
+            if deleted:
+                CustomUser.objects.filter(pk=self.pk, following_count__gt=0).update(following_count=F('following_count') - 1)
+                CustomUser.objects.filter(pk=other.pk, followers_count__gt=0).update(followers_count=F('followers_count') - 1)
+                follow_graph.invalidate(self.pk, other.pk)
+        return bool(deleted)
+
+
+def _counted(column):
+    """Follow rows whose ``column`` is the outer user, for use in ``update()``/``annotate()``."""
+    Follow = CustomUser.followers.through
+    counts = (
+        Follow.objects.filter(**{column: OuterRef('pk')}).order_by().values(column)
+        .annotate(n=Count('id')).values('n')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def counted_followers():
+    return _counted('from_customuser')
+
+
+def counted_following():
+    return _counted('to_customuser')
+
+
+def recount_follows(user_ids):
+    """Recompute both follow counters of ``user_ids`` from the follow rows in one UPDATE."""
+    return CustomUser.objects.filter(pk__in=list(user_ids)).update(
+        followers_count=counted_followers(), following_count=counted_following()
+    )
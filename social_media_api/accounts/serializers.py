@@ -2,14 +2,52 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
+from . import follow_graph, images
+
+User = get_user_model()
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact author representation embedded in posts, comments and notifications."""
+    avatar = serializers.SerializerMethodField()
+    avatars = serializers.SerializerMethodField()
+    is_following = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'avatar', 'avatars', 'followers_count', 'following_count', 'is_following']
+        read_only_fields = fields
+
+    def get_avatars(self, obj):
+        return images.variant_urls(obj, self.context.get('request'))
+
+    def get_avatar(self, obj):
+        # The small variant once it exists, the original until then.
+        variants = self.get_avatars(obj)
+        if 'small' in variants:
+            return variants['small']
+        if not obj.profile_picture:
+            return None
+        request = self.context.get('request')
+        url = obj.profile_picture.url
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_is_following(self, obj):
+        request = self.context.get('request')
+        if request is None:
+            return False
+        return follow_graph.contains(follow_graph.request_following_ids(request), obj.pk)
 
 class UserSerializer(serializers.ModelSerializer):
-    followers = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
-    following = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    profile_picture_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'followers', 'following']
+        fields = ['id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_variants',
+                  'followers_count', 'following_count']
+        read_only_fields = ['followers_count', 'following_count']
+
+    def get_profile_picture_variants(self, obj):
+        return images.variant_urls(obj, self.context.get('request'))
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -23,7 +61,9 @@ class RegisterSerializer(serializers.ModelSerializer):
             email=validated_data['email'],
             password=validated_data['password'],
             bio=validated_data.get('bio', ''),
+            profile_picture=validated_data.get('profile_picture'),
         )
+        images.schedule_variants(user)
         Token.objects.create(user=user)
         return user
 
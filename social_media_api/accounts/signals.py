@@ -0,0 +1,55 @@
+# accounts/signals.py
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from . import follow_graph
+from .authentication import invalidate_tokens
+from .models import CustomUser, recount_follows
+
+Follow = CustomUser.followers.through
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def drop_tokens_of_saved_user(sender, instance, created, **kwargs):
+    # Cached entries hold a copy of the user, so any save (deactivation,
+    # password or profile change) makes them stale.
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+# follow()/unfollow() write the through table directly and keep the counters
+# and follow-graph cache in step themselves. Anything else (admin,
+# followers.add/remove/clear, user deletion cascading to follow rows)
+# recounts the users it touched and drops their cached adjacency sets.
+
+def _neighbour_ids(user_id):
+    rows = Follow.objects.filter(from_customuser=user_id).values_list('to_customuser', flat=True)
+    return set(rows) | set(Follow.objects.filter(to_customuser=user_id).values_list('from_customuser', flat=True))
+
+
+@receiver(m2m_changed, sender=Follow)
+def recount_changed_follows(sender, instance, action, pk_set, **kwargs):
+    if action == 'pre_clear':
+        instance._cleared_follow_ids = _neighbour_ids(instance.pk)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        user_ids = {instance.pk} | set(pk_set or ()) | getattr(instance, '_cleared_follow_ids', set())
+        recount_follows(user_ids)
+        follow_graph.invalidate_users(user_ids)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def remember_follow_neighbours(sender, instance, **kwargs):
+    instance._follow_neighbour_ids = _neighbour_ids(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def recount_follow_neighbours(sender, instance, **kwargs):
+    neighbour_ids = getattr(instance, '_follow_neighbour_ids', set())
+    recount_follows(neighbour_ids)
+    follow_graph.invalidate_users(neighbour_ids | {instance.pk})
@@ -1,3 +1,369 @@
-from django.test import TestCase
+# accounts/tests.py
+import gzip
+import json
+import os
+import tempfile
+from io import BytesIO, StringIO
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from PIL import Image
+from posts.models import Comment, Like, Post
+from . import authentication, checks, follow_graph, throttling
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowTests(APITestCase):
+    def setUp(self):
+        """Create two users and authenticate as the first."""
+        cache.clear()
+        self.alice = User.objects.create_user(username='alice', password='testpass')
+        self.bob = User.objects.create_user(username='bob', password='testpass')
+        self.client.force_authenticate(self.alice)
+
+    def test_follow_updates_counts_once(self):
+        """Following twice counts once; unfollowing brings both counters back down."""
+        self.client.post(reverse('follow', kwargs={'user_id': self.bob.id}))
+        self.client.post(reverse('follow', kwargs={'user_id': self.bob.id}))
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.bob.followers_count), (1, 1))
+        self.assertTrue(self.bob.followers.filter(pk=self.alice.pk).exists())
+        self.client.post(reverse('unfollow', kwargs={'user_id': self.bob.id}))
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.following_count, self.bob.followers_count), (0, 0))
+
+    def test_follow_graph_cache_tracks_orm_changes(self):
+        """Admin/ORM follow edits and user deletion drop the cached adjacency sets."""
+        self.assertEqual(list(follow_graph.follower_ids(self.bob.pk)), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.followers.add(self.alice)
+        self.assertTrue(follow_graph.is_following(self.alice.pk, self.bob.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.remove(self.bob)
+        self.assertFalse(follow_graph.is_following(self.alice.pk, self.bob.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.follow(self.bob)
+        self.assertEqual(list(follow_graph.following_ids(self.alice.pk)), [self.bob.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.delete()
+        self.assertEqual(list(follow_graph.following_ids(self.alice.pk)), [])
+
+    def test_orm_follow_changes_keep_counts(self):
+        """followers.add/remove/clear and deleting a user recount the users they touch."""
+        carol = User.objects.create_user(username='carol', password='testpass')
+        self.bob.followers.add(self.alice, carol)
+        self.alice.following.add(carol)
+        counts = dict(User.objects.values_list('username', 'followers_count'))
+        self.assertEqual(counts, {'alice': 0, 'bob': 2, 'carol': 1})
+        self.bob.followers.remove(carol)
+        self.alice.following.clear()
+        self.assertEqual(list(User.objects.order_by('id').values_list('followers_count', 'following_count')),
+                         [(0, 0), (0, 0), (0, 0)])
+        self.bob.followers.add(carol)
+        carol.delete()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.followers_count, 0)
+
+    def test_reconcile_fixes_drifted_counts(self):
+        """reconcile_follow_counts rewrites counters that disagree with the follow rows."""
+        self.alice.follow(self.bob)
+        User.objects.filter(pk=self.bob.pk).update(followers_count=5)
+        out = StringIO()
+        call_command('reconcile_follow_counts', stdout=out)
+        self.assertIn('Fixed 1 drifted', out.getvalue())
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.followers_count, 1)
+
+    def test_follow_self(self):
+        """Users cannot follow themselves."""
+        response = self.client.post(reverse('follow', kwargs={'user_id': self.alice.id}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_profile_lists_are_paginated(self):
+        """The profile returns counts; the follower list is a separate paginated endpoint."""
+        self.bob.follow(self.alice)
+        self.alice.refresh_from_db()
+        response = self.client.get(reverse('profile'))
+        self.assertNotIn('followers', response.data)
+        self.assertEqual(response.data['followers_count'], 1)
+        response = self.client.get(reverse('profile-followers'))
+        self.assertEqual([u['username'] for u in response.data['results']], ['bob'])
+
+    def test_follow_graph_cache_tracks_follows(self):
+        """Cached adjacency sets are dropped and reloaded when the graph changes."""
+        self.assertFalse(follow_graph.is_following(self.alice.pk, self.bob.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('follow', kwargs={'user_id': self.bob.id}))
+        self.assertTrue(follow_graph.is_following(self.alice.pk, self.bob.pk))
+        self.assertEqual(list(follow_graph.follower_ids(self.bob.pk)), [self.alice.pk])
+        with self.assertNumQueries(0):
+            follow_graph.is_following(self.alice.pk, self.bob.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('unfollow', kwargs={'user_id': self.bob.id}))
+        self.assertFalse(follow_graph.is_following(self.alice.pk, self.bob.pk))
+
+
+class SharedCacheCheckTests(APITestCase):
+    @override_settings(DEBUG=False, CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                                            'shared': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+                       FOLLOW_GRAPH_CACHE='shared', AUTH_TOKEN_CACHE='shared', DATABASE_STICKY_CACHE='shared',
+                       NOTIFICATIONS_STREAM_CACHE='shared')
+    def test_local_memory_cache_fails_deploy_check(self):
+        """Aliases that must be shared are rejected when they point at a local-memory cache."""
+        errors = checks.check_shared_caches(None)
+        self.assertEqual([error.id for error in errors], ['accounts.E001'])
+        self.assertIn('RATE_LIMIT_CACHE', errors[0].msg)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        """Register a user through the API to get a token."""
+        cache.clear()
+        response = self.client.post(reverse('register'), {'username': 'alice', 'email': 'a@example.com',
+                                                           'password': 'S3cure-pass!'}, format='json')
+        self.token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_second_request_skips_token_query(self):
+        """After the first lookup, the token is resolved from the cache."""
+        self.client.get(reverse('profile-following'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profile-following'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cache_holds_no_credentials(self):
+        """Entries are keyed by a hash of the token and leave out the password hash."""
+        self.client.get(reverse('profile-following'))
+        entry = cache.get(authentication._key(self.token))
+        self.assertNotIn(self.token, authentication._key(self.token) + repr(entry))
+        self.assertNotIn('password', entry['fields'])
+
+    def test_cached_user_saves_keep_password(self):
+        """Saving a user rebuilt from the cache leaves its password hash alone."""
+        self.client.get(reverse('profile-following'))
+        with self.assertNumQueries(0):
+            user, _ = authentication.CachedTokenAuthentication().authenticate_credentials(self.token)
+        user.bio = 'hello'
+        user.save()
+        self.assertTrue(User.objects.get(username='alice').check_password('S3cure-pass!'))
+
+    def test_deactivated_user_is_rejected(self):
+        """Deactivating the user drops the cached token."""
+        self.client.get(reverse('profile-following'))
+        user = User.objects.get(username='alice')
+        user.is_active = False
+        user.save()
+        response = self.client.get(reverse('profile-following'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        """Deleting the token drops the cached entry."""
+        self.client.get(reverse('profile-following'))
+        Token.objects.filter(key=self.token).delete()
+        response = self.client.get(reverse('profile-following'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_command_reports_shared_counts(self):
+        """Hits and misses are counted in the cache and printed by token_cache_stats."""
+        for _ in range(3):
+            self.client.get(reverse('profile-following'))
+        out = StringIO()
+        call_command('token_cache_stats', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), ['hits: 2', 'misses: 1'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, RATE_LIMITS={'follow': {'rate': '2/min', 'key': 'user'}, 'login': {'rate': '1/min', 'key': 'ip'}})
+class RateLimitTests(APITestCase):
+    def setUp(self):
+        """Create a user with a token and some accounts to follow."""
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='testpass')
+        self.token = Token.objects.create(user=self.user)
+        self.others = [User.objects.create_user(username=f'user{i}', password='testpass') for i in range(3)]
+
+    def test_rejected_before_database(self):
+        """Requests over the limit get a 429 without a single query and are counted."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        for other in self.others[:2]:
+            response = self.client.post(reverse('follow', kwargs={'user_id': other.pk}))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('follow', kwargs={'user_id': self.others[2].pk}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(throttling.rejection_counts()['follow'], 1)
+
+    def test_limits_are_per_client(self):
+        """Another token has its own budget; login is limited per IP."""
+        other_token = Token.objects.create(user=self.others[0])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        for other in self.others[1:]:
+            self.client.post(reverse('follow', kwargs={'user_id': other.pk}))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {other_token.key}')
+        response = self.client.post(reverse('follow', kwargs={'user_id': self.user.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        credentials = {'username': 'alice', 'password': 'testpass'}
+        self.assertEqual(self.client.post(reverse('login'), credentials).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(reverse('login'), credentials).status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_header_variants_share_a_bucket(self):
+        """Spelling the same token differently doesn't buy a fresh budget."""
+        for header in (f'Token {self.token.key}', f'token {self.token.key}'):
+            self.client.credentials(HTTP_AUTHORIZATION=header)
+            self.client.post(reverse('follow', kwargs={'user_id': self.others[0].pk}))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token  {self.token.key}')
+        response = self.client.post(reverse('follow', kwargs={'user_id': self.others[1].pk}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_unknown_tokens_count_against_ip(self):
+        """Made-up tokens share their IP's budget and are rejected before the token lookup."""
+        for _ in range(2):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.generate_key()}')
+            response = self.client.post(reverse('follow', kwargs={'user_id': self.others[0].pk}))
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.generate_key()}')
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('follow', kwargs={'user_id': self.others[0].pk}))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_sliding_window_weights_previous_window(self):
+        """Half a window later, half of the previous window's requests still count."""
+        for _ in range(4):
+            self.assertIsNone(throttling.hit('test', 'client', 4, 60, now=0))
+        self.assertIsNotNone(throttling.hit('test', 'client', 4, 60, now=30))
+        self.assertIsNone(throttling.hit('test', 'client', 4, 60, now=90))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, MEDIA_ROOT=tempfile.mkdtemp(), AVATAR_WORKERS=0)
+class ProfilePictureTests(APITestCase):
+    def setUp(self):
+        """Authenticate as a user without a picture."""
+        self.user = User.objects.create_user(username='alice', password='testpass')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, filename='me.jpg'):
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, format='JPEG')
+        picture = SimpleUploadedFile(filename, buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(reverse('profile'), {'profile_picture': picture}, format='multipart')
+
+    def test_upload_generates_variants(self):
+        """Uploading a picture produces resized variants and exposes their URLs."""
+        self.assertEqual(self.upload().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.profile_picture_variants), {'thumbnail', 'small', 'medium'})
+        with default_storage.open(self.user.profile_picture_variants['thumbnail']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (64, 48))
+        response = self.client.get(reverse('profile'))
+        self.assertTrue(response.data['profile_picture_variants']['medium'].endswith('_medium.webp'))
+
+    def test_variants_never_replace_other_files(self):
+        """A variant never overwrites an existing file, such as another user's upload."""
+        other = default_storage.save('profiles/cat_small.webp', ContentFile(b'not alice'))
+        self.upload('cat.jpg')
+        with default_storage.open(other) as existing:
+            self.assertEqual(existing.read(), b'not alice')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.profile_picture_variants['small'].startswith(f'profiles/variants/{self.user.pk}/'))
+
+    def test_new_picture_deletes_old_variants(self):
+        """Replacing the picture deletes the previous picture's variants."""
+        self.upload()
+        self.user.refresh_from_db()
+        old = list(self.user.profile_picture_variants.values())
+        self.upload()
+        self.user.refresh_from_db()
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        self.assertTrue(all(default_storage.exists(name) for name in self.user.profile_picture_variants.values()))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ExportTests(APITestCase):
+    def setUp(self):
+        """Give a user a post, a comment and a like."""
+        self.user = User.objects.create_user(username='alice', password='testpass')
+        post = Post.objects.create(author=self.user, title='Hello', content='World')
+        Comment.objects.create(post=post, author=self.user, content='Me first')
+        Like.objects.create(post=post, user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_export_streams_ndjson(self):
+        """The export streams one JSON object per row, gzipped on request."""
+        response = self.client.get(reverse('profile-export'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['type'] for line in lines], ['post', 'comment', 'like'])
+        response = self.client.get(reverse('profile-export'), {'gzip': '1'})
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode().splitlines(), lines)
+
+    async def test_asgi_export_streams_asynchronously(self):
+        """Under ASGI the export is an async iterator, so it isn't collected into a list first."""
+        token = await Token.objects.acreate(user=self.user)
+        response = await self.async_client.get(reverse('profile-export'),
+                                               headers={'Authorization': f'Token {token.key}'})
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)['type'] for line in lines], ['post', 'comment', 'like'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(APITestCase):
+    def setUp(self):
+        """Start with one user who is also in the import file."""
+        User.objects.create_user(username='existing', password='testpass')
+        self.directory = tempfile.mkdtemp()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as handle:
+            handle.write(content)
+        return path
+
+    def test_ndjson_import_with_pool(self):
+        """Users get hashed passwords and tokens; existing and invalid rows are reported, not fatal."""
+        path = self.write('users.ndjson', '\n'.join([
+            json.dumps({'username': 'bob', 'email': 'bob@EXAMPLE.com', 'password': 'pw-bob'}),
+            json.dumps({'username': 'carol', 'password_hash': make_password('pw-carol')}),
+            json.dumps({'username': 'existing', 'password': 'x'}),
+            json.dumps({'email': 'nobody@example.com'}),
+        ]))
+        out, err = StringIO(), StringIO()
+        call_command('import_users', path, '--workers', '2', stdout=out, stderr=err)
+        bob = User.objects.get(username='bob')
+        self.assertTrue(bob.check_password('pw-bob'))
+        self.assertEqual(bob.email, 'bob@example.com')
+        self.assertTrue(User.objects.get(username='carol').check_password('pw-carol'))
+        self.assertEqual(Token.objects.filter(user__username__in=['bob', 'carol']).count(), 2)
+        self.assertIn('Imported 2 users', out.getvalue())
+        self.assertIn('line 4: missing username', err.getvalue())
+
+    def test_csv_import_resumes_from_checkpoint(self):
+        """With a checkpoint, a second run skips the records the first one finished."""
+        path = self.write('users.csv', 'username,email,password\n' + ''.join(
+            f'user{i},user{i}@example.com,pw{i}\n' for i in range(5)
+        ))
+        checkpoint = os.path.join(self.directory, 'progress')
+        call_command('import_users', path, '--workers', '0', '--chunk-size', '2',
+                     '--checkpoint', checkpoint, stdout=StringIO())
+        with open(checkpoint) as handle:
+            self.assertEqual(handle.read(), '5')
+        out = StringIO()
+        call_command('import_users', path, '--workers', '0', '--checkpoint', checkpoint, stdout=out)
+        self.assertIn('Resuming after 5 records', out.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='user').count(), 5)
@@ -0,0 +1,131 @@
+# accounts/throttling.py
+"""Shared-cache rate limiting for write-heavy endpoints.
+
+Each scope in ``RATE_LIMITS`` has a rate such as ``'60/min'`` and a key,
+either ``'user'`` or ``'ip'``. ``'user'`` counts against the request's token,
+parsed the way DRF does (so ``Token X`` and ``token  X`` share a bucket);
+requests without a well-formed token count against their IP. A token that is
+not in the authentication cache yet is also counted against the IP, so
+spraying made-up tokens (each costing a database lookup) is limited too.
+Limits use a sliding-window counter kept in the ``RATE_LIMIT_CACHE``: an
+atomic ``incr`` on the current window's counter, plus the previous window's
+count weighted by how much of it is still inside the sliding window. This
+holds across workers as long as the cache is shared (Redis, Memcached).
+
+``RateLimitMixin`` checks the limit in ``initial()``, before authentication,
+so rejected requests never touch the database. Rejections are counted per
+scope in the cache (``rejection_counts``).
+"""
+import hashlib
+import logging
+import math
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import get_authorization_header
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+from .authentication import CachedTokenAuthentication, is_cached
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def scope_config(scope):
+    return getattr(settings, 'RATE_LIMITS', {}).get(scope)
+
+
+def parse_rate(rate):
+    """``'60/min'`` -> ``(60, 60)``: requests allowed and window length in seconds."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def request_token(request):
+    """The token in the ``Authorization`` header, or None if there isn't a well-formed one."""
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != CachedTokenAuthentication.keyword.lower().encode():
+        return None
+    try:
+        return auth[1].decode()
+    except UnicodeError:
+        return None
+
+
+def client_keys(request, key):
+    """The identities a request is counted against."""
+    # BaseThrottle.get_ident honours REST_FRAMEWORK['NUM_PROXIES'].
+    ip = 'ip:' + BaseThrottle().get_ident(request)
+    token = request_token(request) if key == 'user' else None
+    if token is None:
+        return [ip]
+    user = 'token:' + hashlib.sha256(token.encode()).hexdigest()
+    return [user] if is_cached(token) else [ip, user]
+
+
+def hit(scope, ident, limit, window, now=None):
+    """Count a request; return seconds to wait if it is over the limit, else None."""
+    now = time.time() if now is None else now
+    current = int(now // window)
+    cache = _cache()
+    key = f'ratelimit:{scope}:{ident}:{current}'
+    cache.add(key, 0, window * 2)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr.
+        cache.set(key, 1, window * 2)
+        count = 1
+    previous = cache.get(f'ratelimit:{scope}:{ident}:{current - 1}', 0)
+    elapsed = now - current * window
+    if previous * (1 - elapsed / window) + count <= limit:
+        return None
+    return max(1, math.ceil(window - elapsed))
+
+
+def record_rejection(scope):
+    cache = _cache()
+    key = f'ratelimit:rejected:{scope}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr; losing one count is fine.
+        pass
+
+
+def rejection_counts():
+    """Requests rejected so far, per configured scope, across all workers sharing the cache."""
+    scopes = list(getattr(settings, 'RATE_LIMITS', {}))
+    counts = _cache().get_many([f'ratelimit:rejected:{scope}' for scope in scopes])
+    return {scope: counts.get(f'ratelimit:rejected:{scope}', 0) for scope in scopes}
+
+
+def check(request, scope):
+    """Raise ``Throttled`` if ``request`` is over ``scope``'s limit."""
+    config = scope_config(scope)
+    if not config:
+        return
+    limit, window = parse_rate(config['rate'])
+    for ident in client_keys(request, config.get('key', 'user')):
+        wait = hit(scope, ident, limit, window)
+        if wait is not None:
+            record_rejection(scope)
+            logger.info('Rate limit %s exceeded by %s', scope, ident)
+            raise Throttled(wait=wait)
+
+
+class RateLimitMixin:
+    """Apply ``rate_limit_scopes`` (view action or HTTP method -> scope) before authentication."""
+    rate_limit_scopes = {}
+
+    def initial(self, request, *args, **kwargs):
+        scope = self.rate_limit_scopes.get(getattr(self, 'action', None) or request.method.lower())
+        if scope:
+            check(request, scope)
+        super().initial(request, *args, **kwargs)
@@ -1,11 +1,14 @@
 # accounts/urls.py
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView, FollowViewSet
+from .views import RegisterView, LoginView, ProfileView, ExportView, ProfileFollowersView, ProfileFollowingView, FollowViewSet
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('profile/export/', ExportView.as_view(), name='profile-export'),
+    path('profile/followers/', ProfileFollowersView.as_view(), name='profile-followers'),
+    path('profile/following/', ProfileFollowingView.as_view(), name='profile-following'),
     path('follow/<int:user_id>/', FollowViewSet.as_view({'post': 'follow'}), name='follow'),
     path('unfollow/<int:user_id>/', FollowViewSet.as_view({'post': 'unfollow'}), name='unfollow'),
 ]
\ No newline at end of file
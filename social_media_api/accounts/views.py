@@ -5,8 +5,15 @@ from rest_framework.response import Response
 from rest_framework import permissions
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework.decorators import action
-from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
+from rest_framework.pagination import CursorPagination
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from . import export, images
+from .throttling import RateLimitMixin
+from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, UserSummarySerializer
 from django.shortcuts import get_object_or_404
+from posts import timeline
+from posts.conditional import ConditionalGetMixin
 
 CustomUser = get_user_model()
 
@@ -20,8 +27,9 @@ class RegisterView(generics.CreateAPIView):
         token = Token.objects.get(user=user)
         return Response({'token': token.key, 'user': UserSerializer(user).data}, status=status.HTTP_201_CREATED)
 
-class LoginView(generics.GenericAPIView):
+class LoginView(RateLimitMixin, generics.GenericAPIView):
     serializer_class = LoginSerializer
+    rate_limit_scopes = {'post': 'login'}
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -35,27 +43,74 @@ class LoginView(generics.GenericAPIView):
             return Response({'token': token.key, 'user': UserSerializer(user).data})
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class ProfileView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    validator_fields = ('id', 'username', 'email', 'bio', 'profile_picture', 'profile_picture_variants',
+                        'followers_count', 'following_count')
 
     def get_object(self):
-        return self.request.user
+        # request.user may be a cached copy (CachedTokenAuthentication), so
+        # read the row itself for the up-to-date counters.
+        return CustomUser.objects.get(pk=self.request.user.pk)
 
-class FollowViewSet(viewsets.GenericAPIView):
+    def perform_update(self, serializer):
+        if 'profile_picture' in serializer.validated_data:
+            images.discard_variants(serializer.instance.profile_picture_variants)
+            user = serializer.save(profile_picture_variants={})
+            images.schedule_variants(user)
+        else:
+            serializer.save()
+
+class ExportView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        filename = 'export.ndjson.gz' if compress else 'export.ndjson'
+        stream = export.export_stream(request.user, compress=compress)
+        if isinstance(request._request, ASGIRequest):
+            stream = export.async_chunks(stream)
+        response = StreamingHttpResponse(
+            stream,
+            content_type='application/gzip' if compress else 'application/x-ndjson',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class FollowListPagination(CursorPagination):
+    page_size = 50
+    ordering = 'id'
+
+class ProfileFollowersView(generics.ListAPIView):
+    serializer_class = UserSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FollowListPagination
+
+    def get_queryset(self):
+        return self.request.user.followers.all()
+
+class ProfileFollowingView(ProfileFollowersView):
+    def get_queryset(self):
+        return self.request.user.following.all()
+
+class FollowViewSet(RateLimitMixin, viewsets.GenericViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    rate_limit_scopes = {'follow': 'follow'}
     queryset = CustomUser.objects.all()  # Added to satisfy the check
 
     @action(detail=True, methods=['post'])
-    def follow(self, request, pk=None):
-        user_to_follow = get_object_or_404(self.get_queryset(), pk=pk)
+    def follow(self, request, user_id=None):
+        user_to_follow = get_object_or_404(self.get_queryset(), pk=user_id)
         if user_to_follow != request.user:
-            request.user.following.add(user_to_follow)
+            if request.user.follow(user_to_follow):
+                timeline.add_author(request.user, user_to_follow)
             return Response({'status': f'Following {user_to_follow.username}'})
         return Response({'error': 'Cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['post'])
-    def unfollow(self, request, pk=None):
-        user_to_unfollow = get_object_or_404(self.get_queryset(), pk=pk)
-        request.user.following.remove(user_to_unfollow)
+    def unfollow(self, request, user_id=None):
+        user_to_unfollow = get_object_or_404(self.get_queryset(), pk=user_id)
+        if request.user.unfollow(user_to_unfollow):
+            timeline.remove_author(request.user, user_to_unfollow)
         return Response({'status': f'Unfollowed {user_to_unfollow.username}'})
\ No newline at end of file
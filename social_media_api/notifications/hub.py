@@ -0,0 +1,148 @@
+# notifications/hub.py
+"""Change signals for live notification streams, shared between processes.
+
+``outbox.deliver`` calls ``publish`` once its notifications are committed,
+which bumps a per-recipient version counter in ``NOTIFICATIONS_STREAM_CACHE``.
+The drain worker and the ASGI workers are different processes, so that cache
+must be shared (Redis, Memcached).
+
+Each ASGI worker process runs one watcher thread while it has open streams.
+Every ``NOTIFICATIONS_STREAM_POLL_INTERVAL`` seconds it reads the versions of
+all subscribed recipients in a single ``get_many`` and wakes the streams whose
+version moved. Streams only query the database when woken, however many are
+open.
+
+The hub also caps open streams per process at
+``NOTIFICATIONS_STREAM_MAX_CONNECTIONS``.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+VERSION_TIMEOUT = 86400
+
+_lock = threading.Lock()
+_subscribers = defaultdict(set)
+_open = 0
+_watcher = None
+
+
+def max_connections():
+    return getattr(settings, 'NOTIFICATIONS_STREAM_MAX_CONNECTIONS', 1000)
+
+
+def poll_interval():
+    return getattr(settings, 'NOTIFICATIONS_STREAM_POLL_INTERVAL', 1.0)
+
+
+def _cache():
+    return caches[getattr(settings, 'NOTIFICATIONS_STREAM_CACHE', 'default')]
+
+
+def _version_key(user_id):
+    return f'notif_stream:{user_id}'
+
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self):
+        """Wake the stream; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # The stream's loop has already closed.
+            pass
+
+    async def wait(self, timeout):
+        """Wait up to ``timeout`` seconds; return True if woken by a change."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+def subscribe(user_id):
+    """Open a subscription for ``user_id``, or return None when this process is at its limit."""
+    global _open, _watcher
+    with _lock:
+        if _open >= max_connections():
+            return None
+        _open += 1
+        subscription = Subscription(user_id)
+        _subscribers[user_id].add(subscription)
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name='notification-hub', daemon=True)
+            _watcher.start()
+    return subscription
+
+
+def unsubscribe(subscription):
+    global _open
+    with _lock:
+        _open -= 1
+        subscribers = _subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del _subscribers[subscription.user_id]
+
+
+def open_connections():
+    return _open
+
+
+def publish(notifications):
+    """Signal every process that ``notifications`` (committed) changed for their recipients."""
+    cache = _cache()
+    for user_id in {notification.recipient_id for notification in notifications}:
+        key = _version_key(user_id)
+        cache.add(key, 0, VERSION_TIMEOUT)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr; any new value still differs.
+            cache.set(key, time.time_ns(), VERSION_TIMEOUT)
+
+
+def _watch():
+    """Watcher thread: wake subscriptions whose recipient's version changed, until none are left."""
+    global _watcher
+    seen = {}
+    while True:
+        with _lock:
+            if not _subscribers:
+                _watcher = None
+                return
+            user_ids = list(_subscribers)
+        try:
+            versions = _cache().get_many([_version_key(user_id) for user_id in user_ids])
+        except Exception:
+            logger.exception('Could not read notification stream versions')
+            versions = None
+        if versions is not None:
+            changed = []
+            for user_id in user_ids:
+                version = versions.get(_version_key(user_id))
+                # A recipient seen for the first time is woken once, in case a
+                # change landed between its stream's first query and now.
+                if user_id not in seen or seen[user_id] != version:
+                    changed.append(user_id)
+                seen[user_id] = version
+            seen = {user_id: seen[user_id] for user_id in user_ids}
+            with _lock:
+                targets = [subscription for user_id in changed for subscription in _subscribers.get(user_id, ())]
+            for subscription in targets:
+                subscription.wake()
+        time.sleep(poll_interval())
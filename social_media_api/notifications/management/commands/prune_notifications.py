@@ -0,0 +1,31 @@
+# notifications/management/commands/prune_notifications.py
+import time
+from django.core.management.base import BaseCommand
+from notifications import retention
+
+
+class Command(BaseCommand):
+    help = ('Delete read and unread notifications past their TTLs in small chunks, optionally '
+            'archiving them. Runs once, or continuously with --loop.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per chunk (transaction).')
+        parser.add_argument('--archive', choices=['table', 'ndjson', 'none'],
+                            help='Override NOTIFICATIONS_ARCHIVE for this run.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between chunks.')
+        parser.add_argument('--loop', action='store_true', help='Keep pruning every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=3600)
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be pruned.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for kind, count in retention.expired_counts().items():
+                self.stdout.write(f'{kind}: {count} expired')
+            return
+        while True:
+            pruned = retention.prune(options['batch_size'], mode=options['archive'], sleep=options['sleep'])
+            summary = ', '.join(f'{count} {kind}' for kind, count in pruned.items())
+            self.stdout.write(self.style.SUCCESS(f'Pruned {summary or "nothing"}'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
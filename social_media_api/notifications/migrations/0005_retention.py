@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0004_notification_coalescing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('recipient_id', models.BigIntegerField()),
+                ('actor_id', models.BigIntegerField()),
+                ('verb', models.CharField(max_length=100)),
+                ('target_content_type_id', models.IntegerField()),
+                ('target_object_id', models.PositiveIntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('read', models.BooleanField()),
+                ('actor_count', models.PositiveIntegerField()),
+                ('sample_actor_ids', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['read', 'timestamp', 'id'], name='notif_read_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationarchive',
+            index=models.Index(fields=['recipient_id', '-timestamp'], name='notif_archive_recipient_idx'),
+        ),
+    ]
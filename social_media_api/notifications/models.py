@@ -13,6 +13,48 @@ class Notification(models.Model):
     target = GenericForeignKey('target_content_type', 'target_object_id')
     timestamp = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
+    # Coalesced notifications ("alice and 41 others liked your post"): how many
+    # actors were merged into this row (approximate: an actor no longer among
+    # the samples is counted again if they repeat), and the most recent few.
+    actor_count = models.PositiveIntegerField(default=1)
+    sample_actor_ids = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_ts_idx'),
+            # Range scans for retention pruning (notifications/retention.py).
+            models.Index(fields=['read', 'timestamp', 'id'], name='notif_read_ts_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.actor} {self.verb} {self.target}"
\ No newline at end of file
+        if self.actor_count > 1:
+            return f"{self.actor} and {self.actor_count - 1} others {self.verb} {self.target}"
+        return f"{self.actor} {self.verb} {self.target}"
+
+class NotificationEvent(models.Model):
+    """Outbox row recorded on the request path; drained into Notification in batches."""
+    recipient_id = models.BigIntegerField()
+    actor_id = models.BigIntegerField()
+    verb = models.CharField(max_length=100)
+    target_content_type_id = models.IntegerField()
+    target_object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class NotificationArchive(models.Model):
+    """A pruned Notification, kept when ``NOTIFICATIONS_ARCHIVE = 'table'``."""
+    id = models.BigIntegerField(primary_key=True)  # the original Notification id
+    recipient_id = models.BigIntegerField()
+    actor_id = models.BigIntegerField()
+    verb = models.CharField(max_length=100)
+    target_content_type_id = models.IntegerField()
+    target_object_id = models.PositiveIntegerField()
+    timestamp = models.DateTimeField()
+    read = models.BooleanField()
+    actor_count = models.PositiveIntegerField()
+    sample_actor_ids = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient_id', '-timestamp'], name='notif_archive_recipient_idx'),
+        ]
@@ -0,0 +1,179 @@
+# notifications/outbox.py
+"""Notification outbox.
+
+Views call ``enqueue`` to record a narrow ``NotificationEvent`` row and return;
+the ``drain_notification_outbox`` command turns queued events into
+``Notification`` rows with ``bulk_create``. Set ``NOTIFICATIONS_ASYNC = False``
+to write notifications inline (handy without a worker running).
+"""
+import hashlib
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+from . import hub
+from .models import Notification, NotificationEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def is_async():
+    return getattr(settings, 'NOTIFICATIONS_ASYNC', True)
+
+
+def enqueue(recipient, actor, verb, target):
+    return enqueue_ids(recipient.pk, actor.pk, verb, type(target), target.pk)
+
+
+def enqueue_ids(recipient_id, actor_id, verb, target_model, target_id):
+    """``enqueue`` for callers that only hold ids, e.g. after a raw insert."""
+    event = NotificationEvent(
+        recipient_id=recipient_id,
+        actor_id=actor_id,
+        verb=verb,
+        target_content_type_id=ContentType.objects.get_for_model(target_model).pk,
+        target_object_id=target_id,
+    )
+    if is_async():
+        event.save()
+    else:
+        with transaction.atomic():
+            deliver([event])
+    return event
+
+
+def coalesce_window():
+    """Seconds within which events for the same (recipient, verb, target) share one row; 0 disables."""
+    return getattr(settings, 'NOTIFICATIONS_COALESCE_WINDOW', 3600)
+
+
+def sample_size():
+    return getattr(settings, 'NOTIFICATIONS_SAMPLE_ACTORS', 3)
+
+
+def _key(item):
+    return (item.recipient_id, item.verb, item.target_content_type_id, item.target_object_id)
+
+
+def _lock_keys(keys):
+    """Hold a transaction-level lock per key until commit, so concurrent
+    drain workers can't both find no open row for a key and each create one.
+
+    Uses PostgreSQL advisory locks, taken in a fixed order to avoid
+    deadlocks; SQLite allows one writing transaction at a time anyway.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    lock_ids = sorted({
+        int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=8).digest(), 'big', signed=True)
+        for key in keys
+    })
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(k) FROM unnest(%s::bigint[]) AS k ORDER BY k', [lock_ids])
+
+
+def deliver(events):
+    """Write ``Notification`` rows for ``events``. Call inside a transaction.
+
+    With coalescing on, events sharing a key are merged with each other and
+    with any unread notification for that key updated within the window.
+    A merged row is updated in place and its ``timestamp`` moves to now, so
+    it rises to the top of newest-first lists. Actors already among the
+    samples aren't counted again.
+
+    ``actor_count`` is therefore approximate: only the last
+    ``NOTIFICATIONS_SAMPLE_ACTORS`` actors are remembered, so someone who
+    unlikes and likes again after being pushed out of the samples is counted
+    twice. Exact distinct counts would mean keeping every actor id on the row.
+    """
+    window = coalesce_window()
+    if not window:
+        return _published(Notification.objects.bulk_create([
+            Notification(
+                recipient_id=event.recipient_id,
+                actor_id=event.actor_id,
+                verb=event.verb,
+                target_content_type_id=event.target_content_type_id,
+                target_object_id=event.target_object_id,
+                sample_actor_ids=[event.actor_id],
+            )
+            for event in events
+        ]))
+
+    groups = {}
+    for event in events:
+        groups.setdefault(_key(event), []).append(event)
+    _lock_keys(groups)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=window)
+    open_rows = Notification.objects.filter(
+        recipient_id__in={key[0] for key in groups},
+        target_object_id__in={key[3] for key in groups},
+        read=False,
+        timestamp__gte=cutoff,
+    ).order_by('timestamp')
+    existing = {}
+    for notification in open_rows:
+        existing.setdefault(_key(notification), notification)
+
+    created, updated = [], []
+    for key, group in groups.items():
+        notification = existing.get(key)
+        if notification is None:
+            first = group[0]
+            notification = Notification(
+                recipient_id=first.recipient_id,
+                verb=first.verb,
+                target_content_type_id=first.target_content_type_id,
+                target_object_id=first.target_object_id,
+                actor_count=0,
+                sample_actor_ids=[],
+            )
+            created.append(notification)
+        else:
+            notification.timestamp = now
+            updated.append(notification)
+        for event in group:
+            if event.actor_id in notification.sample_actor_ids:
+                continue
+            notification.actor_id = event.actor_id
+            notification.actor_count += 1
+            notification.sample_actor_ids = ([event.actor_id] + notification.sample_actor_ids)[:sample_size()]
+    Notification.objects.bulk_create(created)
+    Notification.objects.bulk_update(updated, ['actor', 'actor_count', 'sample_actor_ids', 'timestamp'])
+    return _published(created + updated)
+
+
+def _published(notifications):
+    """Tell live streams (``hub``) about ``notifications`` once they are committed."""
+    transaction.on_commit(lambda: hub.publish(notifications))
+    return notifications
+
+
+def drain(batch_size=DEFAULT_BATCH_SIZE):
+    """Deliver up to ``batch_size`` of the oldest queued events. Returns how many were handled.
+
+    Rows are claimed with ``SKIP LOCKED`` where supported, so several workers can drain at once.
+    """
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+        deliver(events)
+        NotificationEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    return len(events)
+
+
+def stats():
+    """Queue depth and the age in seconds of the oldest queued event."""
+    summary = NotificationEvent.objects.aggregate(oldest=Min('created_at'))
+    depth = NotificationEvent.objects.count()
+    lag = (timezone.now() - summary['oldest']).total_seconds() if summary['oldest'] else 0.0
+    return {'depth': depth, 'lag_seconds': lag}
@@ -0,0 +1,115 @@
+# notifications/retention.py
+"""Notification retention.
+
+Read notifications older than ``NOTIFICATIONS_READ_TTL_DAYS`` and unread ones
+older than ``NOTIFICATIONS_UNREAD_TTL_DAYS`` (None keeps them forever) are
+deleted by ``prune`` in chunks of ``batch_size`` rows. Each chunk is one short
+transaction over a range of the ``(read, timestamp, id)`` index, and rows
+locked by someone else are skipped rather than waited for.
+
+``NOTIFICATIONS_ARCHIVE`` keeps a copy of what is pruned: 'table' copies the
+rows into ``NotificationArchive`` in the same transaction, 'ndjson' appends
+them to a gzipped NDJSON file per day in ``NOTIFICATIONS_ARCHIVE_DIR`` (at
+least once: a chunk whose delete fails is archived again on the next run).
+"""
+import gzip
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from .models import Notification, NotificationArchive
+
+ARCHIVE_MODES = ('table', 'ndjson', 'none')
+ARCHIVE_FIELDS = ('id', 'recipient_id', 'actor_id', 'verb', 'target_content_type_id', 'target_object_id',
+                  'timestamp', 'read', 'actor_count', 'sample_actor_ids')
+
+
+def read_ttl_days():
+    return getattr(settings, 'NOTIFICATIONS_READ_TTL_DAYS', 30)
+
+
+def unread_ttl_days():
+    return getattr(settings, 'NOTIFICATIONS_UNREAD_TTL_DAYS', 180)
+
+
+def batch_size():
+    return getattr(settings, 'NOTIFICATIONS_PRUNE_BATCH_SIZE', 1000)
+
+
+def archive_mode():
+    return getattr(settings, 'NOTIFICATIONS_ARCHIVE', None) or 'none'
+
+
+def archive_dir():
+    return getattr(settings, 'NOTIFICATIONS_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+
+
+def cutoffs(now=None):
+    """``(read, cutoff)`` for each configured TTL: rows with that flag older than cutoff expire."""
+    now = timezone.now() if now is None else now
+    return [
+        (read, now - timedelta(days=days))
+        for read, days in ((True, read_ttl_days()), (False, unread_ttl_days()))
+        if days is not None
+    ]
+
+
+def expired_counts(now=None):
+    return {
+        'read' if read else 'unread': Notification.objects.filter(read=read, timestamp__lt=cutoff).count()
+        for read, cutoff in cutoffs(now)
+    }
+
+
+def archive_rows(rows, mode, now):
+    if mode == 'table':
+        NotificationArchive.objects.bulk_create([NotificationArchive(**row) for row in rows], ignore_conflicts=True)
+    elif mode == 'ndjson':
+        os.makedirs(archive_dir(), exist_ok=True)
+        path = os.path.join(archive_dir(), f'notifications-{now:%Y%m%d}.ndjson.gz')
+        encoder = DjangoJSONEncoder()
+        # Appending writes a new gzip member; readers see one continuous stream.
+        with gzip.open(path, 'ab') as archive:
+            archive.write(''.join(encoder.encode(row) + '\n' for row in rows).encode())
+
+
+def prune_chunk(read, cutoff, size, mode, now):
+    """Delete (and archive) up to ``size`` of the oldest expired rows; return how many."""
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(read=read, timestamp__lt=cutoff)
+            .order_by('timestamp', 'id')
+            .values(*ARCHIVE_FIELDS)[:size]
+        )
+        if rows:
+            archive_rows(rows, mode, now)
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def prune(size=None, mode=None, sleep=0, now=None):
+    """Delete every expired notification, chunk by chunk. Returns ``{'read': n, 'unread': n}``.
+
+    ``mode`` overrides ``NOTIFICATIONS_ARCHIVE``; ``sleep`` pauses between
+    chunks to leave room for other traffic.
+    """
+    size = batch_size() if size is None else size
+    mode = mode or archive_mode()
+    assert mode in ARCHIVE_MODES, f'Unknown archive mode {mode!r}'
+    now = timezone.now() if now is None else now
+    pruned = {}
+    for read, cutoff in cutoffs(now):
+        key = 'read' if read else 'unread'
+        pruned[key] = 0
+        while True:
+            deleted = prune_chunk(read, cutoff, size, mode, now)
+            pruned[key] += deleted
+            if deleted < size:
+                break
+            if sleep:
+                time.sleep(sleep)
+    return pruned
@@ -1,13 +1,42 @@
 # notifications/serializers.py
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Notification
-from accounts.serializers import UserSerializer
+from .targets import resolve_targets, summarize_target
+from accounts.serializers import UserSummarySerializer
+
+def attach_sample_actors(notifications):
+    """Set ``sample_actors`` on each notification from one query for the whole page."""
+    ids = {actor_id for notification in notifications for actor_id in notification.sample_actor_ids}
+    users = get_user_model().objects.in_bulk(ids) if ids else {}
+    for notification in notifications:
+        notification.sample_actors = [users[i] for i in notification.sample_actor_ids if i in users]
+
+class NotificationListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        notifications = list(data.all() if hasattr(data, 'all') else data)
+        resolve_targets(notifications)
+        attach_sample_actors(notifications)
+        return super().to_representation(notifications)
 
 class NotificationSerializer(serializers.ModelSerializer):
-    actor = UserSerializer(read_only=True)
-    target = serializers.StringRelatedField()
+    actor = UserSummarySerializer(read_only=True)
+    target = serializers.SerializerMethodField()
+    sample_actors = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ['id', 'recipient', 'actor', 'verb', 'target', 'timestamp', 'read']
-        read_only_fields = ['recipient', 'actor', 'target', 'timestamp']
\ No newline at end of file
+        fields = ['id', 'recipient', 'actor', 'actor_count', 'sample_actors', 'verb', 'target', 'timestamp', 'read']
+        read_only_fields = ['recipient', 'actor', 'actor_count', 'target', 'timestamp']
+        list_serializer_class = NotificationListSerializer
+
+    def get_target(self, obj):
+        if not hasattr(obj, 'resolved_target'):
+            resolve_targets([obj])
+        return summarize_target(obj.resolved_target)
+
+
+    def get_sample_actors(self, obj):
+        if not hasattr(obj, 'sample_actors'):
+            attach_sample_actors([obj])
+        return UserSummarySerializer(obj.sample_actors, many=True, context=self.context).data
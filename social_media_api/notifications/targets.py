@@ -0,0 +1,53 @@
+# notifications/targets.py
+"""Batched resolution of ``Notification.target``.
+
+Reading ``notification.target`` runs one query per row (plus whatever the
+target's ``__str__`` touches). ``resolve_targets`` instead groups a page of
+notifications by content type and loads each group with a single query.
+"""
+from collections import defaultdict
+from django.contrib.contenttypes.models import ContentType
+
+# Relations each target type needs for its summary, keyed by model label.
+TARGET_SELECT_RELATED = {
+    'posts.post': [],
+    'posts.comment': ['post'],
+}
+
+EXCERPT_LENGTH = 80
+
+
+def resolve_targets(notifications):
+    """Set ``resolved_target`` on each notification (``None`` if the target is gone)."""
+    ids_by_type = defaultdict(set)
+    for notification in notifications:
+        ids_by_type[notification.target_content_type_id].add(notification.target_object_id)
+    loaded = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        queryset = model._default_manager.filter(pk__in=ids)
+        related = TARGET_SELECT_RELATED.get(model._meta.label_lower)
+        if related:
+            queryset = queryset.select_related(*related)
+        for obj in queryset:
+            loaded[content_type_id, obj.pk] = obj
+    for notification in notifications:
+        notification.resolved_target = loaded.get((notification.target_content_type_id, notification.target_object_id))
+
+
+def summarize_target(obj):
+    """Compact, query-free representation of a resolved target."""
+    if obj is None:
+        return None
+    label = obj._meta.label_lower
+    summary = {'type': obj._meta.model_name, 'id': obj.pk}
+    if label == 'posts.post':
+        summary['title'] = obj.title
+    elif label == 'posts.comment':
+        summary['post'] = {'id': obj.post_id, 'title': obj.post.title}
+        summary['excerpt'] = obj.content[:EXCERPT_LENGTH]
+    else:
+        summary['text'] = str(obj)
+    return summary
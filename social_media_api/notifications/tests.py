@@ -1,3 +1,266 @@
-from django.test import TestCase
+# notifications/tests.py
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from accounts import follow_graph
+from posts.models import Comment, Post
+from . import hub, outbox, retention
+from .models import Notification, NotificationArchive, NotificationEvent
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationOutboxTests(APITestCase):
+    def setUp(self):
+        """Create a post and a user who likes it."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.fan = User.objects.create_user(username='fan', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.client.force_authenticate(self.fan)
+
+    def test_like_queues_event(self):
+        """Liking records an outbox event instead of writing the notification inline."""
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        self.assertEqual(NotificationEvent.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_drain_delivers_events(self):
+        """The drain command turns queued events into notifications and empties the queue."""
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        call_command('drain_notification_outbox', stdout=StringIO())
+        self.assertFalse(NotificationEvent.objects.exists())
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.actor, notification.target), (self.author, self.fan, self.post))
+
+    def test_like_and_event_commit_together(self):
+        """If the outbox event can't be written, the like and its counter roll back too."""
+        with mock.patch.object(outbox, 'enqueue_ids', side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.likes.count()), (0, 0))
+
+    def test_drain_counts_outbox_only_on_timer(self):
+        """Draining doesn't run the queue-depth COUNT after every batch."""
+        for fan in [User.objects.create_user(username=f'fan{i}') for i in range(3)]:
+            outbox.enqueue(self.author, fan, 'liked your post', self.post)
+        with mock.patch.object(outbox, 'stats', wraps=outbox.stats) as stats:
+            call_command('drain_notification_outbox', batch_size=1, stdout=StringIO())
+        self.assertEqual(stats.call_count, 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListTests(APITestCase):
+    def setUp(self):
+        """Create a mix of post and comment notifications for one recipient."""
+        cache.clear()
+        self.recipient = User.objects.create_user(username='recipient', password='testpass')
+        post_type = ContentType.objects.get_for_model(Post)
+        comment_type = ContentType.objects.get_for_model(Comment)
+        for i in range(6):
+            actor = User.objects.create_user(username=f'actor{i}', password='testpass')
+            post = Post.objects.create(author=self.recipient, title=f'post {i}', content='x')
+            comment = Comment.objects.create(post=post, author=actor, content='nice')
+            Notification.objects.create(recipient=self.recipient, actor=actor, verb='liked your post',
+                                        target_content_type=post_type, target_object_id=post.id)
+            Notification.objects.create(recipient=self.recipient, actor=actor, verb='commented',
+                                        target_content_type=comment_type, target_object_id=comment.id)
+        self.client.force_authenticate(self.recipient)
+
+    def test_query_count_is_independent_of_page_size(self):
+        """A page costs one query for the rows plus one per target type."""
+        ContentType.objects.clear_cache()
+        ContentType.objects.get_for_models(Post, Comment)
+        follow_graph.following_ids(self.recipient.pk)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('notifications-list'), {'page_size': 12})
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(response.data['results'][0]['target']['type'], 'comment')
+        self.assertEqual(response.data['results'][1]['target']['title'], 'post 5')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationCoalescingTests(APITestCase):
+    def setUp(self):
+        """Create a post and several fans."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass') for i in range(5)]
+
+    def like_as(self, user):
+        self.client.force_authenticate(user)
+        self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+
+    def test_likes_merge_into_one_row(self):
+        """Likes on one post within the window become a single notification with samples."""
+        for fan in self.fans[:3]:
+            self.like_as(fan)
+        call_command('drain_notification_outbox', batch_size=2, stdout=StringIO())
+        for fan in self.fans[3:]:
+            self.like_as(fan)
+        call_command('drain_notification_outbox', stdout=StringIO())
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.actor, self.fans[4])
+        self.assertEqual(notification.sample_actor_ids, [fan.id for fan in reversed(self.fans[2:])])
+        self.client.force_authenticate(self.author)
+        item = self.client.get(reverse('notifications-list')).data['results'][0]
+        self.assertEqual([a['username'] for a in item['sample_actors']], ['fan4', 'fan3', 'fan2'])
+
+    def test_merge_moves_row_to_top(self):
+        """A merged notification is re-timestamped, so it lists ahead of newer ones."""
+        self.like_as(self.fans[0])
+        call_command('drain_notification_outbox', stdout=StringIO())
+        other = Post.objects.create(author=self.author, title='Other', content='x')
+        Notification.objects.create(recipient=self.author, actor=self.fans[1], verb='liked your post', target=other)
+        self.like_as(self.fans[2])
+        call_command('drain_notification_outbox', stdout=StringIO())
+        self.client.force_authenticate(self.author)
+        first = self.client.get(reverse('notifications-list')).data['results'][0]
+        self.assertEqual(first['actor_count'], 2)
+
+    def test_read_notification_starts_new_row(self):
+        """Once the recipient has read the merged row, later likes start a new one."""
+        self.like_as(self.fans[0])
+        call_command('drain_notification_outbox', stdout=StringIO())
+        Notification.objects.update(read=True)
+        self.like_as(self.fans[1])
+        call_command('drain_notification_outbox', stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATIONS_STREAM_HEARTBEAT=10, NOTIFICATIONS_STREAM_MAX_SECONDS=0.5,
+                   NOTIFICATIONS_STREAM_POLL_INTERVAL=0.05)
+class NotificationStreamTests(APITestCase):
+    def setUp(self):
+        """Create a post with two notifications for its author."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.fan = User.objects.create_user(username='fan', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.token = Token.objects.create(user=self.author)
+        self.first, self.second = [
+            Notification.objects.create(recipient=self.author, actor=self.fan, verb='liked your post',
+                                        target=self.post, sample_actor_ids=[self.fan.pk])
+            for _ in range(2)
+        ]
+
+    async def read_stream(self, **headers):
+        """Read a whole stream, returning (seconds since start, chunk) pairs."""
+        started = time.monotonic()
+        response = await self.async_client.get(
+            reverse('notification-stream'), headers={'Authorization': f'Token {self.token.key}', **headers}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return [(time.monotonic() - started, chunk.decode()) async for chunk in response.streaming_content]
+
+    async def test_last_event_id_resumes(self):
+        """Reconnecting with Last-Event-ID replays only what came after it."""
+        chunks = await self.read_stream(**{'Last-Event-ID': str(self.first.pk)})
+        events = [chunk for _, chunk in chunks if 'event: notification' in chunk]
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].startswith(f'id: {self.second.pk}\n'))
+
+    def drain_like(self, fan, post):
+        """Queue a like notification and drain it like the outbox worker would, committing."""
+        outbox.enqueue(post.author, fan, 'liked your post', post)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('drain_notification_outbox', stdout=StringIO())
+
+    async def stream_while(self, action):
+        """Read a stream while ``action`` runs shortly after it opens; return its notification events."""
+        async def act():
+            await asyncio.sleep(0.1)
+            await sync_to_async(action)()
+        chunks, _ = await asyncio.gather(self.read_stream(), act())
+        self.assertEqual(hub.open_connections(), 0)
+        return [(at, chunk) for at, chunk in chunks if 'event: notification' in chunk]
+
+    async def test_outbox_deliveries_reach_stream(self):
+        """A notification written by the outbox drain is sent before the next heartbeat."""
+        other = await Post.objects.acreate(author=self.author, title='Other', content='x')
+        events = await self.stream_while(lambda: self.drain_like(self.fan, other))
+        self.assertEqual(len(events), 1)
+        self.assertLess(events[0][0], 0.4)
+        notification = await Notification.objects.aget(target_object_id=other.pk)
+        self.assertTrue(events[0][1].startswith(f'id: {notification.pk}\n'))
+
+    async def test_coalesced_updates_reach_stream(self):
+        """A notification the outbox merged another actor into is re-sent with its new count."""
+        fan = await User.objects.acreate(username='fan2')
+        events = await self.stream_while(lambda: self.drain_like(fan, self.post))
+        self.assertEqual(len(events), 1)
+        payload = json.loads(events[0][1].split('data: ', 1)[1])
+        self.assertEqual((payload['id'], payload['actor_count']), (self.first.pk, 2))
+        # The resume cursor doesn't go back to the merged row's id.
+        self.assertTrue(events[0][1].startswith(f'id: {self.second.pk}\n'))
+
+    @override_settings(NOTIFICATIONS_STREAM_MAX_CONNECTIONS=0)
+    def test_connection_limit(self):
+        """Streams beyond the per-process limit are turned away."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        response = self.client.get(reverse('notification-stream'))
+        self.assertEqual(response.status_code, 503)
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('notification-stream')).status_code, 401)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATIONS_READ_TTL_DAYS=30, NOTIFICATIONS_UNREAD_TTL_DAYS=180)
+class NotificationRetentionTests(APITestCase):
+    def setUp(self):
+        """Create read and unread notifications of various ages."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.fan = User.objects.create_user(username='fan', password='testpass')
+        post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.ages = {}
+        for read, days in [(True, 40), (True, 35), (True, 31), (True, 5), (False, 40), (False, 200)]:
+            notification = Notification.objects.create(recipient=self.author, actor=self.fan, verb='liked your post',
+                                                       target=post, read=read)
+            Notification.objects.filter(pk=notification.pk).update(timestamp=timezone.now() - timedelta(days=days))
+            self.ages[notification.pk] = (read, days)
+
+    def expected_survivors(self):
+        return {pk for pk, (read, days) in self.ages.items() if days < (30 if read else 180)}
+
+    def test_prune_in_chunks_into_archive_table(self):
+        """Expired rows move to the archive table chunk by chunk; the rest stay."""
+        pruned = retention.prune(size=2, mode='table')
+        self.assertEqual(pruned, {'read': 3, 'unread': 1})
+        self.assertEqual(set(Notification.objects.values_list('id', flat=True)), self.expected_survivors())
+        self.assertEqual(NotificationArchive.objects.count(), 4)
+
+    def test_prune_to_ndjson(self):
+        """With NDJSON archiving, pruned rows are appended to a gzipped file."""
+        directory = tempfile.mkdtemp()
+        with self.settings(NOTIFICATIONS_ARCHIVE='ndjson', NOTIFICATIONS_ARCHIVE_DIR=directory):
+            call_command('prune_notifications', '--batch-size', '1', stdout=StringIO())
+        [name] = os.listdir(directory)
+        with gzip.open(os.path.join(directory, name), 'rt') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual(len(rows), 4)
+        self.assertFalse(NotificationArchive.objects.exists())
+        self.assertEqual(set(Notification.objects.values_list('id', flat=True)), self.expected_survivors())
+
+    def test_dry_run_only_counts(self):
+        """--dry-run reports what would be pruned without deleting."""
+        out = StringIO()
+        call_command('prune_notifications', '--dry-run', stdout=out)
+        self.assertIn('read: 3 expired', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 6)
@@ -0,0 +1,12 @@
+# notifications/urls.py
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import NotificationViewSet, notification_stream
+
+router = DefaultRouter()
+router.register(r'notifications', NotificationViewSet, basename='notifications')
+
+urlpatterns = [
+    path('notifications/stream/', notification_stream, name='notification-stream'),
+    path('', include(router.urls)),
+]
@@ -1,11 +1,172 @@
 # notifications/views.py
-from rest_framework import viewsets
+import json
+import time
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import exceptions, viewsets, permissions
+from accounts.authentication import CachedTokenAuthentication
+from posts.pagination import KeysetPagination
+from . import hub, outbox
 from .models import Notification
 from .serializers import NotificationSerializer
 
+class NotificationPagination(KeysetPagination):
+    page_size = 20
+    ordering = ('-timestamp', '-id')
+
 class NotificationViewSet(viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user).order_by('-timestamp')
\ No newline at end of file
+        return Notification.objects.filter(recipient=self.request.user).select_related('actor').order_by('-timestamp', '-id')
+
+
+def stream_heartbeat():
+    return getattr(settings, 'NOTIFICATIONS_STREAM_HEARTBEAT', 15)
+
+
+def stream_max_seconds():
+    return getattr(settings, 'NOTIFICATIONS_STREAM_MAX_SECONDS', 300)
+
+
+def stream_batch_size():
+    return getattr(settings, 'NOTIFICATIONS_STREAM_BATCH_SIZE', 50)
+
+
+async def authenticate_stream(request):
+    """Token (``Authorization`` header) or session user, else None."""
+    try:
+        result = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    except exceptions.AuthenticationFailed:
+        return None
+    if result is not None:
+        return result[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def open_rows_filter():
+    """Unread notifications recent enough that the outbox may still merge events into them."""
+    window = outbox.coalesce_window()
+    if not window:
+        return None
+    return Q(read=False, timestamp__gte=timezone.now() - timedelta(seconds=window))
+
+
+async def open_counts(user_id):
+    """``{id: actor_count}`` of the user's notifications that may still be coalesced into."""
+    condition = open_rows_filter()
+    if condition is None:
+        return {}
+    queryset = Notification.objects.filter(condition, recipient_id=user_id).values_list('id', 'actor_count')
+    return {pk: count async for pk, count in queryset}
+
+
+async def fetch_changes(user_id, last_id, counts):
+    """Notifications created after ``last_id``, then older ones whose actor count moved since ``counts``.
+
+    ``counts`` is replaced with the current open rows' counts; returns the rows to send.
+    """
+    new = [
+        notification async for notification in
+        Notification.objects.filter(recipient_id=user_id, id__gt=last_id)
+        .select_related('actor').order_by('id')[:stream_batch_size()]
+    ]
+    changed = []
+    condition = open_rows_filter()
+    if condition is not None:
+        current = {}
+        rows = Notification.objects.filter(condition, recipient_id=user_id, id__lte=last_id).select_related('actor')
+        async for notification in rows.order_by('id'):
+            current[notification.pk] = notification.actor_count
+            if counts.get(notification.pk) != notification.actor_count:
+                changed.append(notification)
+        counts.clear()
+        counts.update(current)
+    for notification in new:
+        counts[notification.pk] = notification.actor_count
+    return changed + new
+
+
+def serialize_notifications(request, notifications):
+    # Follow state may have changed since the last batch on this long-lived request.
+    request.__dict__.pop('_following_ids', None)
+    return NotificationSerializer(notifications, many=True, context={'request': request}).data
+
+
+async def event_stream(request, last_id):
+    subscription = hub.subscribe(request.user.pk)
+    if subscription is None:
+        yield 'retry: 5000\n\n'
+        return
+    try:
+        yield f'retry: {stream_heartbeat() * 1000:.0f}\n\n'
+        deadline = time.monotonic() + stream_max_seconds()
+        counts = await open_counts(request.user.pk)
+        changed = True
+        while True:
+            if changed:
+                notifications = await fetch_changes(request.user.pk, last_id, counts)
+                if notifications:
+                    payloads = await sync_to_async(serialize_notifications)(request, notifications)
+                    for notification, payload in zip(notifications, payloads):
+                        # The event id is a resume cursor, so it never goes backwards
+                        # when an older, coalesced notification is re-sent.
+                        last_id = max(last_id, notification.pk)
+                        yield f'id: {last_id}\nevent: notification\ndata: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n'
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if changed and len(notifications) >= stream_batch_size():
+                continue
+            changed = await subscription.wait(min(stream_heartbeat(), remaining))
+            if not changed:
+                yield ': heartbeat\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def notification_stream(request):
+    """Server-Sent Events stream of the user's notifications.
+
+    New notifications, and open ones the outbox merged more actors into, are
+    sent as ``notification`` events when ``hub`` signals a change for the
+    user, from whichever process wrote them; idle streams only send
+    heartbeats. Each event's id is a cursor: reconnecting with
+    ``Last-Event-ID`` (or ``?last_event_id=``) replays what was created since.
+    Streams end after ``NOTIFICATIONS_STREAM_MAX_SECONDS`` and the client
+    reconnects.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user = await authenticate_stream(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if hub.open_connections() >= hub.max_connections():
+        response = JsonResponse({'detail': 'Too many open streams, retry later.'}, status=503)
+        response['Retry-After'] = '5'
+        return response
+    last_id = last_event_id(request)
+    if last_id is None:
+        summary = await Notification.objects.filter(recipient=user).aaggregate(last=Max('id'))
+        last_id = summary['last'] or 0
+    request.user = user
+    response = StreamingHttpResponse(event_stream(request, last_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,117 @@
+# posts/conditional.py
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+STRATEGIES = ('etag', 'last-modified', 'both', None)
+
+LAST_MODIFIED_TIMEOUT = 86400
+
+
+def _cache():
+    return caches[getattr(settings, 'CONDITIONAL_GET_CACHE', 'default')]
+
+
+def field_value(obj, path):
+    """``obj``'s value for ``path``, following ``__``-separated relations."""
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+    return obj
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified support for ``list`` and ``retrieve``.
+
+    The validator is computed from a few fields of the rows that would be
+    serialized (``validator_fields``, which may follow already-loaded
+    relations as ``author__username``, plus ``get_validator_extra`` for data
+    that lives elsewhere), so a matching ``If-None-Match`` or
+    ``If-Modified-Since`` gets a 304 before any serializer runs.
+
+    Likes, comments and author changes don't touch a post's ``updated_at``,
+    so Last-Modified is derived from the same digest as the ETag: the time
+    this viewer's URL was first seen with that digest, remembered in
+    ``CONDITIONAL_GET_CACHE`` and always later than the digest it replaced.
+
+    ``conditional_strategy`` picks the validators sent: 'etag',
+    'last-modified', 'both' or None. ``CONDITIONAL_GET_STRATEGIES`` in
+    settings can override it per view class name.
+    """
+    conditional_strategy = 'etag'
+    validator_fields = ('id', 'updated_at')
+
+    def get_conditional_strategy(self):
+        overrides = getattr(settings, 'CONDITIONAL_GET_STRATEGIES', {})
+        strategy = overrides.get(type(self).__name__, self.conditional_strategy)
+        assert strategy in STRATEGIES, f'Unknown conditional strategy {strategy!r}'
+        return strategy
+
+    def get_validator_extra(self, objects):
+        return ''
+
+    def get_last_modified(self, digest):
+        """When this viewer's URL was first seen with ``digest``, in whole seconds."""
+        url = f'{self.request.user.pk}|{self.request.get_full_path()}'
+        key = 'conditional:' + hashlib.md5(url.encode()).hexdigest()
+        cache = _cache()
+        seen = cache.get(key)
+        if seen is not None and seen[0] == digest:
+            return seen[1]
+        now = int(time.time())
+        # Strictly later than the previous digest's time, even within the same
+        # second, so a client holding that time never gets a 304 for this one.
+        modified = now if seen is None else max(now, seen[1] + 1)
+        cache.set(key, (digest, modified), LAST_MODIFIED_TIMEOUT)
+        return modified
+
+    def get_validators(self, objects):
+        strategy = self.get_conditional_strategy()
+        if strategy is None:
+            return None, None
+        rows = [tuple(field_value(obj, field) for field in self.validator_fields) for obj in objects]
+        digest = hashlib.md5(f'{rows!r}|{self.get_validator_extra(objects)}'.encode()).hexdigest()
+        etag = f'W/"{digest}"' if strategy in ('etag', 'both') else None
+        last_modified = self.get_last_modified(digest) if strategy in ('last-modified', 'both') else None
+        return etag, last_modified
+
+    def conditional_response(self, objects):
+        """Return a 304/412 response if the client's copy is current, else None."""
+        self._validators = self.get_validators(objects)
+        etag, last_modified = self._validators
+        if etag is None and last_modified is None:
+            return None
+        return get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, last_modified = getattr(self, '_validators', (None, None))
+        if etag:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        if etag or last_modified is not None:
+            response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(page if page is not None else queryset)
+        not_modified = self.conditional_response(objects)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(objects, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        not_modified = self.conditional_response([instance])
+        if not_modified is not None:
+            return not_modified
+        return Response(self.get_serializer(instance).data)
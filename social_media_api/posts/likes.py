@@ -0,0 +1,125 @@
+# posts/likes.py
+"""Single-statement, idempotent like writes.
+
+``add_like`` inserts with ``ON CONFLICT DO NOTHING ... RETURNING`` so a
+duplicate or concurrent like is a no-op instead of an IntegrityError, and
+the caller learns from the same statement whether a row was written.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Like, Post
+
+RETURNING_VENDORS = ('postgresql', 'sqlite')
+
+
+def _insert_like(user_id, post_id):
+    """Insert the like; returns the post's author id if a row was written, else None."""
+    like_table = connection.ops.quote_name(Like._meta.db_table)
+    post_table = connection.ops.quote_name(Post._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {like_table} (post_id, user_id, created_at) "
+            f"SELECT id, %s, %s FROM {post_table} WHERE id = %s "
+            f"ON CONFLICT (post_id, user_id) DO NOTHING RETURNING post_id",
+            [user_id, connection.ops.adapt_datetimefield_value(timezone.now()), post_id],
+        )
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(
+            f"UPDATE {post_table} SET likes_count = likes_count + 1 WHERE id = %s RETURNING author_id",
+            [post_id],
+        )
+        return cursor.fetchone()[0]
+
+
+def add_like(user_id, post_id):
+    """Like ``post_id`` as ``user_id``.
+
+    Returns ``(created, author_id)``; ``author_id`` is None when nothing changed.
+    Raises ``Post.DoesNotExist`` if the post is missing.
+    """
+    with transaction.atomic():
+        if connection.vendor in RETURNING_VENDORS:
+            author_id = _insert_like(user_id, post_id)
+        else:
+            post = Post.objects.get(pk=post_id)
+            _, created = Like.objects.get_or_create(user_id=user_id, post_id=post_id)
+            author_id = post.author_id if created else None
+            if created:
+                Post.objects.filter(pk=post_id).update(likes_count=F('likes_count') + 1)
+    if author_id is None and not Post.objects.filter(pk=post_id).exists():
+        raise Post.DoesNotExist
+    return author_id is not None, author_id
+
+
+def remove_like(user_id, post_id):
+    """Unlike; returns True if a like was deleted. Raises ``Post.DoesNotExist`` if the post is missing."""
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(user_id=user_id, post_id=post_id).delete()
+        if deleted:
+            Post.objects.filter(pk=post_id, likes_count__gt=0).update(likes_count=F('likes_count') - 1)
+    if not deleted and not Post.objects.filter(pk=post_id).exists():
+        raise Post.DoesNotExist
+    return bool(deleted)
+
+
+def counted_likes():
+    """The number of Like rows for the outer ``Post``, for use in ``update()``/``annotate()``."""
+    like_counts = (
+        Like.objects.filter(post=OuterRef('pk')).order_by().values('post')
+        .annotate(n=Count('id')).values('n')
+    )
+    return Coalesce(Subquery(like_counts), 0)
+
+
+def _insert_likes(pairs, batch_size):
+    """Multi-row ``INSERT ... ON CONFLICT DO NOTHING RETURNING``; returns how many rows were written."""
+    like_table = connection.ops.quote_name(Like._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    max_params = connection.features.max_query_params
+    if max_params:
+        batch_size = min(batch_size, max_params // 3)
+    inserted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {like_table} (post_id, user_id, created_at) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT (post_id, user_id) DO NOTHING RETURNING id",
+                [value for post_id, user_id in batch for value in (post_id, user_id, now)],
+            )
+            inserted += len(cursor.fetchall())
+    return inserted
+
+
+def bulk_add_likes(pairs, batch_size=1000):
+    """Insert ``(post_id, user_id)`` pairs, skipping duplicates, and refresh the affected counters.
+
+    Returns ``(inserted, duplicates, skipped)``: likes written, pairs that were
+    already liked (or repeated in ``pairs``), and pairs naming a missing post
+    or user, which are dropped.
+    """
+    pairs = list(pairs)
+    unique = set(pairs)
+    post_ids = set(Post.objects.filter(pk__in={p for p, _ in unique}).values_list('pk', flat=True))
+    user_ids = set(get_user_model().objects.filter(pk__in={u for _, u in unique}).values_list('pk', flat=True))
+    accepted = [(p, u) for p, u in unique if p in post_ids and u in user_ids]
+    skipped = sum(1 for p, u in pairs if p not in post_ids or u not in user_ids)
+    with transaction.atomic():
+        if connection.vendor in RETURNING_VENDORS:
+            inserted = _insert_likes(accepted, batch_size)
+        else:
+            touched = Like.objects.filter(post_id__in={p for p, _ in accepted})
+            before = touched.count()
+            Like.objects.bulk_create(
+                [Like(post_id=post_id, user_id=user_id) for post_id, user_id in accepted],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            inserted = touched.count() - before
+        Post.objects.filter(pk__in={p for p, _ in accepted}).update(likes_count=counted_likes())
+    return inserted, len(pairs) - skipped - inserted, skipped
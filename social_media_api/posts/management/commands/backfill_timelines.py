@@ -0,0 +1,19 @@
+# posts/management/commands/backfill_timelines.py
+from django.core.management.base import BaseCommand
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Fill materialized home timelines from existing follows and posts. Safe to re-run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-author', type=int, default=None,
+                            help='Recent posts to copy per followed author (default: TIMELINE_BACKFILL_SIZE).')
+
+    def handle(self, *args, **options):
+        users = timeline.users_with_followed_accounts()
+        total = 0
+        for user in users.iterator():
+            for author in user.following.all():
+                total += timeline.add_author(user, author, limit=options['per_author'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {total} timeline entries'))
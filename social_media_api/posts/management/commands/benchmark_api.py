@@ -0,0 +1,122 @@
+# posts/management/commands/benchmark_api.py
+import json
+import platform
+import random
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from posts.models import Post
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(pct / 100.0 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = ('Measure latency percentiles and query counts for the main API endpoints in-process '
+            'against the configured database (e.g. after generate_social_graph), and write JSON results. '
+            'Like/unlike scenarios write to the database.')
+
+    scenarios = ('feed', 'post_list', 'post_retrieve', 'like', 'unlike', 'notification_list')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--users', type=int, default=20, help='Distinct users to rotate through.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', nargs='*', choices=self.scenarios, help='Run just these scenarios.')
+        parser.add_argument('--label', default='', help='Free-form label stored with the results.')
+        parser.add_argument('--output', '-o', help='Write JSON results here as well as printing a summary.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users = list(get_user_model().objects.filter(is_active=True).order_by('-following_count')[:options['users']])
+        post_ids = list(Post.objects.order_by('?').values_list('id', flat=True)[:500])
+        if not users or not post_ids:
+            raise CommandError('No data to benchmark; run generate_social_graph first.')
+        tokens = {user.pk: Token.objects.get_or_create(user=user)[0].key for user in users}
+        client = APIClient(HTTP_HOST=(settings.ALLOWED_HOSTS or ['localhost'])[0])
+
+        results = {}
+        for name in options['only'] or self.scenarios:
+            samples, queries, statuses = [], [], {}
+            for i in range(options['warmup'] + options['iterations']):
+                user = rng.choice(users)
+                post_id = rng.choice(post_ids)
+                client.credentials(HTTP_AUTHORIZATION=f'Token {tokens[user.pk]}')
+                method, url = self.request_for(name, post_id)
+                if name == 'unlike':
+                    # Make sure there is something to remove.
+                    client.post(reverse('post-like', kwargs={'pk': post_id}), secure=True)
+                with ExitStack() as stack:
+                    captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                    started = time.perf_counter()
+                    response = getattr(client, method)(url, secure=True)
+                    if hasattr(response, 'streaming_content'):
+                        b''.join(response.streaming_content)
+                    elapsed = (time.perf_counter() - started) * 1000
+                if i < options['warmup']:
+                    continue
+                samples.append(elapsed)
+                queries.append(sum(len(context) for context in captured))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            results[name] = self.summarize(samples, queries, statuses)
+            self.stdout.write(
+                f"{name:18} p50 {results[name]['p50_ms']:8.2f}ms  p95 {results[name]['p95_ms']:8.2f}ms  "
+                f"p99 {results[name]['p99_ms']:8.2f}ms  queries p50 {results[name]['queries_p50']}"
+                f"/max {results[name]['queries_max']}  {statuses}"
+            )
+
+        report = {
+            'label': options['label'],
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'iterations': options['iterations'],
+            'seed': options['seed'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def request_for(self, name, post_id):
+        if name == 'feed':
+            return 'get', reverse('feed')
+        if name == 'post_list':
+            return 'get', reverse('posts-list')
+        if name == 'post_retrieve':
+            return 'get', reverse('posts-detail', kwargs={'pk': post_id})
+        if name == 'like':
+            return 'post', reverse('post-like', kwargs={'pk': post_id})
+        if name == 'unlike':
+            return 'post', reverse('post-unlike', kwargs={'pk': post_id})
+        return 'get', reverse('notifications-list')
+
+    def summarize(self, samples, queries, statuses):
+        samples = sorted(samples)
+        queries = sorted(queries)
+        return {
+            'count': len(samples),
+            'mean_ms': sum(samples) / len(samples),
+            'p50_ms': percentile(samples, 50),
+            'p95_ms': percentile(samples, 95),
+            'p99_ms': percentile(samples, 99),
+            'max_ms': samples[-1],
+            'queries_p50': percentile(queries, 50),
+            'queries_max': queries[-1],
+            'status_codes': {str(code): n for code, n in statuses.items()},
+        }
@@ -0,0 +1,14 @@
+# posts/management/commands/compact_trending.py
+from django.core.management.base import BaseCommand
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Decay trending scores left in older epochs and prune negligible ones. Run at least once per epoch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rescaled, pruned = trending.compact(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rescaled {rescaled} scores, pruned {pruned}'))
@@ -0,0 +1,162 @@
+# posts/management/commands/generate_social_graph.py
+import random
+from collections import Counter
+from itertools import accumulate
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from notifications.models import Notification
+from posts.models import Comment, Like, Post, comment_path_segment
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Generate a seeded synthetic dataset: users with power-law follower counts, '
+            'posts, comments, likes and notifications. Passwords are all "password".')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--avg-following', type=int, default=50, help='Mean accounts followed per user.')
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Power-law exponent for account popularity (higher = more skewed).')
+        parser.add_argument('--posts-per-user', type=float, default=10)
+        parser.add_argument('--comments-per-post', type=float, default=2)
+        parser.add_argument('--likes-per-post', type=float, default=8)
+        parser.add_argument('--notification-rate', type=float, default=0.5,
+                            help='Fraction of likes that also get a notification row.')
+        parser.add_argument('--days', type=int, default=30, help='Spread content over this many past days.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='synthetic', help='Username prefix.')
+        parser.add_argument('--no-timelines', action='store_true', help='Skip backfilling home timelines.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.span = timedelta(days=options['days']).total_seconds()
+        with transaction.atomic():
+            user_ids = self.create_users(options)
+            popularity = self.popularity(len(user_ids), options['alpha'])
+            self.create_follows(user_ids, popularity, options['avg_following'])
+            posts = self.create_posts(user_ids, popularity, options['posts_per_user'])
+            self.create_comments(posts, user_ids, options['comments_per_post'])
+            likes = self.create_likes(posts, user_ids, options['likes_per_post'])
+            self.create_notifications(posts, likes, options['notification_rate'])
+        if not options['no_timelines']:
+            call_command('backfill_timelines', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def random_time(self):
+        return self.now - timedelta(seconds=self.rng.random() * self.span)
+
+    def popularity(self, n, alpha):
+        """Zipf-like weights over a shuffled ranking, so popular accounts aren't just the first ids."""
+        ranks = list(range(1, n + 1))
+        self.rng.shuffle(ranks)
+        return [1.0 / rank ** alpha for rank in ranks]
+
+    def log(self, label, count):
+        self.stdout.write(f'{label}: {count}')
+
+    def create_users(self, options):
+        User = get_user_model()
+        password = make_password('password')
+        users = [
+            User(username=f"{options['prefix']}_{options['seed']}_{i}", email=f"{options['prefix']}{i}@example.com",
+                 password=password, date_joined=self.random_time())
+            for i in range(options['users'])
+        ]
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        self.log('users', len(users))
+        return [user.pk for user in users]
+
+    def create_follows(self, user_ids, popularity, avg_following):
+        User = get_user_model()
+        Follow = User.followers.through
+        edges = set()
+        # choices(weights=...) would rebuild the cumulative weights on every call.
+        cum_weights = list(accumulate(popularity))
+        for follower in user_ids:
+            wanted = min(len(user_ids) - 1, int(self.rng.expovariate(1.0 / avg_following)) if avg_following else 0)
+            for followed in self.rng.choices(user_ids, cum_weights=cum_weights, k=wanted):
+                if followed != follower:
+                    edges.add((followed, follower))
+        Follow.objects.bulk_create(
+            [Follow(from_customuser_id=followed, to_customuser_id=follower) for followed, follower in edges],
+            batch_size=BATCH_SIZE, ignore_conflicts=True,
+        )
+        followers = Counter(followed for followed, _ in edges)
+        following = Counter(follower for _, follower in edges)
+        users = [User(pk=pk, followers_count=followers[pk], following_count=following[pk]) for pk in user_ids]
+        User.objects.bulk_update(users, ['followers_count', 'following_count'], batch_size=BATCH_SIZE)
+        self.log('follows', len(edges))
+
+    def create_posts(self, user_ids, popularity, per_user):
+        top = max(popularity)
+        posts = []
+        for author, weight in zip(user_ids, popularity):
+            # Popular accounts post more, but everyone posts a little.
+            count = int(self.rng.expovariate(1.0 / per_user) * (0.5 + weight / top)) if per_user else 0
+            for _ in range(count):
+                words = self.rng.sample(WORDS, 12)
+                posts.append(Post(author_id=author, title=' '.join(words[:4]).capitalize(),
+                                  content=' '.join(words) + '.'))
+        Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        for post in posts:
+            post.created_at = post.updated_at = self.random_time()
+        Post.objects.bulk_update(posts, ['created_at', 'updated_at'], batch_size=BATCH_SIZE)
+        self.log('posts', len(posts))
+        return posts
+
+    def create_comments(self, posts, user_ids, per_post):
+        comments = []
+        for post in posts:
+            for _ in range(int(self.rng.expovariate(1.0 / per_post)) if per_post else 0):
+                comments.append(Comment(post_id=post.pk, author_id=self.rng.choice(user_ids),
+                                        content=' '.join(self.rng.sample(WORDS, 6))))
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        for comment in comments:
+            comment.created_at = comment.updated_at = self.random_time()
+            comment.path = comment_path_segment(comment.pk)
+        Comment.objects.bulk_update(comments, ['created_at', 'updated_at', 'path'], batch_size=BATCH_SIZE)
+        self.log('comments', len(comments))
+
+    def create_likes(self, posts, user_ids, per_post):
+        pairs = set()
+        for post in posts:
+            for _ in range(int(self.rng.expovariate(1.0 / per_post)) if per_post else 0):
+                pairs.add((post.pk, self.rng.choice(user_ids)))
+        Like.objects.bulk_create([Like(post_id=p, user_id=u) for p, u in pairs],
+                                 batch_size=BATCH_SIZE, ignore_conflicts=True)
+        counts = Counter(post_id for post_id, _ in pairs)
+        for post in posts:
+            post.likes_count = counts[post.pk]
+        Post.objects.bulk_update(posts, ['likes_count'], batch_size=BATCH_SIZE)
+        self.log('likes', len(pairs))
+        return pairs
+
+    def create_notifications(self, posts, likes, rate):
+        authors = {post.pk: post.author_id for post in posts}
+        post_type = ContentType.objects.get_for_model(Post)
+        notifications = [
+            Notification(recipient_id=authors[post_id], actor_id=user_id, verb='liked your post',
+                         target_content_type=post_type, target_object_id=post_id,
+                         sample_actor_ids=[user_id])
+            for post_id, user_id in likes
+            if authors.get(post_id) != user_id and self.rng.random() < rate
+        ]
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        self.log('notifications', len(notifications))
+
+
+WORDS = (
+    'coffee morning city river mountain garden music guitar bread sourdough street market travel '
+    'photo sunset winter summer project code python django release weekend friends family dinner '
+    'recipe book chapter movie series game match team goal training run bike trail ocean beach '
+    'library museum concert festival podcast episode idea plan launch design sketch paint color'
+).split()
@@ -0,0 +1,28 @@
+# posts/management/commands/rebuild_timeline.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Discard and rebuild materialized home timelines for the given users (or everyone).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Users to rebuild; all users with follows if omitted.')
+        parser.add_argument('--per-author', type=int, default=None,
+                            help='Recent posts to copy per followed author (default: TIMELINE_BACKFILL_SIZE).')
+
+    def handle(self, *args, **options):
+        if options['usernames']:
+            users = get_user_model().objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        else:
+            users = timeline.users_with_followed_accounts()
+        rebuilt = 0
+        for user in users.iterator():
+            written = timeline.rebuild_timeline(user, limit=options['per_author'])
+            rebuilt += 1
+            self.stdout.write(f'{user.username}: {written} entries')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} timelines'))
@@ -0,0 +1,33 @@
+# posts/management/commands/reconcile_like_counts.py
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from posts.likes import counted_likes
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recompute Post.likes_count from Like rows and fix any counters that have drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts checked per batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            ids = list(Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+            drifted = Post.objects.filter(id__in=ids).annotate(actual=counted_likes()).exclude(likes_count=F('actual'))
+            if options['dry_run']:
+                fixed += drifted.count()
+            else:
+                # Count and write in the same UPDATE, so a like or unlike landing
+                # between a separate read and write can't be overwritten.
+                fixed += drifted.update(likes_count=counted_likes())
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} posts. {action} {fixed} drifted counters.'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.post')),
+                ('epoch', models.IntegerField()),
+                ('score', models.FloatField(default=0.0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-epoch', '-score'], name='posts_trending_rank_idx')],
+            },
+        ),
+    ]
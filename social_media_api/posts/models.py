@@ -1,6 +1,7 @@
 # posts/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 
 class Post(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -8,19 +9,71 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized Like count, kept in step by PostViewSet.like/unlike
+    # and repaired by the reconcile_like_counts command.
+    likes_count = models.PositiveIntegerField(default=0)
+    # Weighted title/content tsvector, filled by a trigger on PostgreSQL (see migration 0005).
+    # SQLite keeps an FTS5 table (posts_post_fts) in step instead and leaves this NULL.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_post_created_id_idx'),
+            # Pull authors' posts are merged into feeds newest first (posts/timeline.py).
+            models.Index(fields=['author', '-created_at', '-id'], name='posts_post_author_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+COMMENT_PATH_WIDTH = 8
+BASE36_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def comment_path_segment(pk):
+    """``pk`` as a zero-padded base-36 string, so paths sort like id sequences."""
+    digits = ''
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        digits = BASE36_DIGITS[remainder] + digits
+    return digits.rjust(COMMENT_PATH_WIDTH, '0')
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Threading (posts/threads.py): ``path`` is the ids of the ancestors and of
+    # this comment, COMMENT_PATH_WIDTH base-36 characters each, and ``depth``
+    # is 0 for top-level comments.
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='children')
+    path = models.CharField(max_length=255, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='posts_comment_created_id_idx'),
+            models.Index(fields=['post', 'path'], name='posts_comment_thread_idx'),
+            models.Index(fields=['post', 'depth', '-created_at', '-id'], name='posts_comment_roots_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.path:
+            return super().save(*args, **kwargs)
+        # The path needs our own id, so it is filled in right after the INSERT.
+        with transaction.atomic(using=kwargs.get('using')):
+            prefix = ''
+            if self.parent_id:
+                self.depth = self.parent.depth + 1
+                prefix = self.parent.path
+            super().save(*args, **kwargs)
+            self.path = prefix + comment_path_segment(self.pk)
+            type(self).objects.using(self._state.db).filter(pk=self.pk).update(path=self.path)
 # posts/models.py (Add Like model)
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
@@ -28,4 +81,36 @@ class Like(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ['post', 'user']
\ No newline at end of file
+        unique_together = ['post', 'user']
+
+class TimelineEntry(models.Model):
+    """Materialized home-timeline row: ``post`` appears in ``user``'s feed.
+
+    ``created_at`` is copied from the post so that a feed page is a single
+    range scan over the ``(user, -created_at, -post)`` index.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='posts_timeline_user_idx'),
+        ]
+
+
+class TrendingScore(models.Model):
+    """Time-decayed engagement score for a post (see posts/trending.py).
+
+    ``score`` is expressed relative to the start of ``epoch``; rows from older
+    epochs are rescaled by the compact_trending command.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    epoch = models.IntegerField()
+    score = models.FloatField(default=0.0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-epoch', '-score'], name='posts_trending_rank_idx'),
+        ]
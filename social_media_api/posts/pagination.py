@@ -0,0 +1,97 @@
+# posts/pagination.py
+import base64
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from .timeline import timeline_page
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a ``(timestamp, id)`` key.
+
+    Each page is ``WHERE (ts, id) < (cursor_ts, cursor_id) ORDER BY ts DESC,
+    id DESC LIMIT n + 1``, so it is served from a composite index no matter how
+    deep the client scrolls, never runs ``COUNT(*)`` and does not shift when
+    new rows are inserted at the head of the list.
+    """
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field = self.ordering[0].lstrip('-')
+        rows = self.get_rows(queryset, self.decode_cursor(request), self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(getattr(rows[-1], field), rows[-1].pk) if self.has_next else None
+        return rows
+
+    def get_rows(self, queryset, cursor, limit):
+        """Up to ``limit`` rows after ``cursor`` (a ``(value, pk)`` key, or None for the first page)."""
+        field = self.ordering[0].lstrip('-')
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            value, pk = cursor
+            if self.ordering[0].startswith('-'):
+                queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+            else:
+                queryset = queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+        return list(queryset[:limit])
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, pk = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').rsplit('|', 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, value, pk):
+        return base64.urlsafe_b64encode(f'{value.isoformat()}|{pk}'.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class TimelinePagination(KeysetPagination):
+    """Keyset pages of the requesting user's home feed.
+
+    Rows come from ``timeline.timeline_page`` (the user's timeline entries
+    merged with pull authors' posts) rather than from the view's queryset.
+    """
+
+    def get_rows(self, queryset, cursor, limit):
+        return timeline_page(self.request.user, limit, before=cursor)
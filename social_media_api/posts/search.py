@@ -0,0 +1,47 @@
+# posts/search.py
+"""Full-text post search.
+
+PostgreSQL matches against the trigger-maintained ``Post.search_vector``
+through its GIN index and ranks with ``ts_rank``. SQLite uses the
+``posts_post_fts`` FTS5 table and ``bm25``. Both are created by migration
+0005; other backends fall back to substring matching.
+"""
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+
+FTS5_RANK_SQL = (
+    "SELECT -bm25(posts_post_fts, 2.0, 1.0) FROM posts_post_fts "
+    "WHERE posts_post_fts MATCH %s AND posts_post_fts.rowid = posts_post.id"
+)
+FTS5_MATCH_SQL = "SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s"
+
+
+def fts5_query(text):
+    """Quote each word so user input can't inject FTS5 query syntax."""
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def search_posts(queryset, text):
+    """Filter ``queryset`` to posts matching ``text``, best match first."""
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        queryset = queryset.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+    elif vendor == 'sqlite':
+        match = fts5_query(text)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(id__in=RawSQL(FTS5_MATCH_SQL, [match])).annotate(
+            rank=RawSQL(FTS5_RANK_SQL, [match], output_field=FloatField())
+        )
+    else:
+        queryset = queryset.filter(Q(title__icontains=text) | Q(content__icontains=text)).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+    return queryset.order_by('-rank', '-created_at', '-id')
@@ -1,34 +1,126 @@
 # posts/serializers.py
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
 from rest_framework import serializers
 from .models import Post, Comment
-from accounts.serializers import UserSerializer
+from . import threads
+from accounts.serializers import UserSummarySerializer
+
+
+def comment_preview_size():
+    return getattr(settings, 'POSTS_COMMENT_PREVIEW_SIZE', 3)
+
+
+def attach_comment_previews(posts, limit=None):
+    """Set ``comment_preview`` and ``comments_count`` on each post in one query.
+
+    A window function numbers each post's comments newest first, so the whole
+    page's previews and totals come back together however large the threads are.
+    """
+    limit = comment_preview_size() if limit is None else limit
+    by_id = {post.pk: post for post in posts}
+    previews = defaultdict(list)
+    counts = {}
+    if by_id:
+        rows = (
+            Comment.objects.filter(post_id__in=by_id)
+            .select_related('author')
+            .annotate(
+                row_number=Window(RowNumber(), partition_by=F('post_id'),
+                                  order_by=[F('created_at').desc(), F('id').desc()]),
+                post_total=Window(Count('id'), partition_by=F('post_id')),
+            )
+            .filter(row_number__lte=max(limit, 1))
+            .order_by('post_id', 'row_number')
+        )
+        for comment in rows:
+            counts[comment.post_id] = comment.post_total
+            if comment.row_number <= limit:
+                previews[comment.post_id].append(comment)
+    for post_id, post in by_id.items():
+        post.comment_preview = previews[post_id]
+        post.comments_count = counts.get(post_id, 0)
+
 
 class CommentSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
+    author = UserSummarySerializer(read_only=True)
 
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
-        read_only_fields = ['author']
+        fields = ['id', 'post', 'parent', 'depth', 'author', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['author', 'depth']
 
-class PostSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    def validate(self, attrs):
+        if self.instance is not None:
+            # A comment's path is fixed when it is created.
+            for field in ('post', 'parent'):
+                if field in attrs and attrs[field] != getattr(self.instance, field):
+                    raise serializers.ValidationError({field: 'Comments cannot be moved.'})
+            return attrs
+        parent = attrs.get('parent')
+        if parent is not None:
+            if parent.post_id != attrs['post'].pk:
+                raise serializers.ValidationError({'parent': 'Reply must be on the same post.'})
+            if parent.depth >= threads.max_depth():
+                raise serializers.ValidationError({'parent': 'This thread is too deep to reply to.'})
+        return attrs
+
+class CommentThreadSerializer(CommentSerializer):
+    """A comment with its loaded replies (``threads.attach_replies``) nested."""
+    replies = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['replies']
+
+    def get_replies(self, comment):
+        return CommentThreadSerializer(getattr(comment, 'replies', []), many=True, context=self.context).data
+
+class PostListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        attach_comment_previews(posts)
+        return super().to_representation(posts)
+
+    def create(self, validated_data):
+        # One INSERT for the whole batch; callers handle timeline fan-out.
+        return Post.objects.bulk_create([Post(**attrs) for attrs in validated_data])
 
-    class Meta:
-        model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments']
-        read_only_fields = ['author']
-        # posts/serializers.py
 class PostSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    likes_count = serializers.SerializerMethodField()
+    author = UserSummarySerializer(read_only=True)
+    comments_preview = CommentSerializer(source='comment_preview', many=True, read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments', 'likes_count']
+        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at',
+                  'comments_preview', 'comments_count', 'likes_count']
         read_only_fields = ['author']
+        list_serializer_class = PostListSerializer
+
+    def to_representation(self, instance):
+        if not hasattr(instance, 'comment_preview'):
+            attach_comment_previews([instance])
+        return super().to_representation(instance)
+
+
+def post_batch_limit():
+    return getattr(settings, 'POSTS_BATCH_CREATE_LIMIT', 100)
+
+
+def like_batch_limit():
+    return getattr(settings, 'POSTS_LIKE_BATCH_LIMIT', 1000)
+
+class LikeEventSerializer(serializers.Serializer):
+    post = serializers.IntegerField(min_value=1)
+    user = serializers.IntegerField(min_value=1)
+
+class LikeBatchSerializer(serializers.Serializer):
+    likes = LikeEventSerializer(many=True, allow_empty=False)
 
-    def get_likes_count(self, obj):
-        return obj.likes.count()
\ No newline at end of file
+    def validate_likes(self, value):
+        if len(value) > like_batch_limit():
+            raise serializers.ValidationError(f'At most {like_batch_limit()} likes per batch.')
+        return value
@@ -1,3 +1,538 @@
-from django.test import TestCase
+# posts/tests.py
+import json
+import os
+import tempfile
+from io import StringIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase, APITransactionTestCase
+from social_media_api.routers import PrimaryReplicaRouter, ReadYourWritesMiddleware
+from . import trending
+from .models import Comment, Like, Post, TimelineEntry, TrendingScore
 
-# Create your tests here.
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedTimelineTests(APITestCase):
+    def setUp(self):
+        """Create a reader who follows one author."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.other = User.objects.create_user(username='other', password='testpass')
+        self.reader = User.objects.create_user(username='reader', password='testpass')
+        self.reader.follow(self.author)
+        self.author.refresh_from_db()
+        self.client.force_authenticate(self.author)
+
+    def test_create_post_fans_out_to_followers(self):
+        """Creating a post writes a timeline entry for each follower only."""
+        response = self.client.post(reverse('posts-list'), {'title': 'Hello', 'content': 'World'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(TimelineEntry.objects.values_list('user_id', flat=True)), [self.reader.id])
+
+    def test_feed_reads_timeline(self):
+        """The feed lists followed authors' posts newest first and skips others."""
+        first = Post.objects.create(author=self.other, title='first', content='x')
+        stranger = User.objects.create_user(username='stranger', password='testpass')
+        Post.objects.create(author=stranger, title='unfollowed', content='x')
+        self.client.post(reverse('posts-list'), {'title': 'second', 'content': 'x'}, format='json')
+        self.client.force_authenticate(self.reader)
+        self.client.post(reverse('follow', kwargs={'user_id': self.other.id}))
+        response = self.client.get(reverse('feed'))
+        self.assertEqual([p['title'] for p in response.data['results']], ['second', first.title])
+
+    def test_unfollow_removes_entries(self):
+        """Unfollowing an author drops their posts from the reader's timeline."""
+        self.client.post(reverse('posts-list'), {'title': 'Hello', 'content': 'World'}, format='json')
+        self.client.force_authenticate(self.reader)
+        self.client.post(reverse('unfollow', kwargs={'user_id': self.author.id}))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.client.get(reverse('feed')).data['results'], [])
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=1)
+    def test_high_follower_author_is_pulled(self):
+        """Authors over the fan-out threshold are read at request time instead."""
+        self.client.post(reverse('posts-list'), {'title': 'Hello', 'content': 'World'}, format='json')
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('feed'))
+        self.assertEqual([p['title'] for p in response.data['results']], ['Hello'])
+
+    def test_pages_merge_pushed_and_pulled_posts(self):
+        """Cursor pages interleave timeline entries with pull authors' posts by time, once each."""
+        celebrity = User.objects.create_user(username='celebrity', password='testpass')
+        self.reader.follow(celebrity)
+        for i in range(3):
+            self.client.post(reverse('posts-list'), {'title': f'pushed {i}', 'content': 'x'}, format='json')
+            Post.objects.create(author=celebrity, title=f'pulled {i}', content='x')
+        self.client.force_authenticate(self.reader)
+        with override_settings(TIMELINE_FANOUT_THRESHOLD=1):
+            response = self.client.get(reverse('feed'), {'page_size': 4})
+            titles = [p['title'] for p in response.data['results']]
+            response = self.client.get(response.data['next'])
+        titles += [p['title'] for p in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(titles, ['pulled 2', 'pushed 2', 'pulled 1', 'pushed 1', 'pulled 0', 'pushed 0'])
+
+    @override_settings(TIMELINE_MAX_LENGTH=2, TIMELINE_TRIM_EVERY=1)
+    def test_fan_out_trims_timelines(self):
+        """Fan-out keeps only the newest TIMELINE_MAX_LENGTH entries per follower."""
+        for i in range(4):
+            self.client.post(reverse('posts-list'), {'title': f'post {i}', 'content': 'x'}, format='json')
+        entries = TimelineEntry.objects.filter(user=self.reader).order_by('-created_at', '-post_id')
+        self.assertEqual([entry.post.title for entry in entries], ['post 3', 'post 2'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostBatchCreateTests(APITestCase):
+    def setUp(self):
+        """Create an author with one follower."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.reader = User.objects.create_user(username='reader', password='testpass')
+        self.reader.follow(self.author)
+        self.author.refresh_from_db()
+        self.client.force_authenticate(self.author)
+
+    def test_batch_creates_posts_and_fans_out(self):
+        """Every post is owned by the requester and lands in followers' timelines."""
+        other = User.objects.create_user(username='other', password='testpass')
+        items = [{'title': f'post {i}', 'content': 'x', 'author': other.pk} for i in range(3)]
+        response = self.client.post(reverse('posts-create-batch'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['title'] for item in response.data], ['post 0', 'post 1', 'post 2'])
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 3)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 3)
+
+    def test_invalid_item_rejects_batch(self):
+        """One invalid item fails the whole batch with an error per item."""
+        items = [{'title': 'ok', 'content': 'x'}, {'content': 'no title'}]
+        response = self.client.post(reverse('posts-create-batch'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data), [1])
+        self.assertIn('title', response.data[1])
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POSTS_BATCH_CREATE_LIMIT=2)
+    def test_batch_limit(self):
+        """Batches over the configured limit are refused."""
+        items = [{'title': f'post {i}', 'content': 'x'} for i in range(3)]
+        response = self.client.post(reverse('posts-create-batch'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        """Create more posts than fit on one page."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.posts = [Post.objects.create(author=self.author, title=f'post {i}', content='x') for i in range(15)]
+
+    def test_cursor_pages_are_stable(self):
+        """Following ``next`` walks every post once, even when new posts arrive between pages."""
+        response = self.client.get(reverse('posts-list'))
+        seen = [p['id'] for p in response.data['results']]
+        self.assertNotIn('count', response.data)
+        Post.objects.create(author=self.author, title='newer', content='x')
+        response = self.client.get(response.data['next'])
+        seen += [p['id'] for p in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(seen, [p.id for p in reversed(self.posts)])
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is a 404 rather than a server error."""
+        response = self.client.get(reverse('posts-list'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LikeCounterTests(APITestCase):
+    def setUp(self):
+        """Create a post and a second user to like it."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.fan = User.objects.create_user(username='fan', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.client.force_authenticate(self.fan)
+
+    def test_like_and_unlike_update_counter(self):
+        """like/unlike move likes_count by one, and repeats are reported as no-ops."""
+        response = self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('post-like', kwargs={'pk': self.post.pk}))
+        self.assertEqual((response.status_code, response.data['changed']), (status.HTTP_200_OK, False))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertTrue(self.client.post(reverse('post-unlike', kwargs={'pk': self.post.pk})).data['changed'])
+        self.assertFalse(self.client.post(reverse('post-unlike', kwargs={'pk': self.post.pk})).data['changed'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_like_missing_post(self):
+        """Liking a post that doesn't exist is a 404."""
+        response = self.client.post(reverse('post-like', kwargs={'pk': self.post.pk + 100}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch_like_ingestion(self):
+        """Admins can load many likes at once; existing likes and unknown ids are reported apart."""
+        Like.objects.create(post=self.post, user=self.fan)
+        admin = User.objects.create_superuser(username='admin', password='testpass')
+        self.client.force_authenticate(admin)
+        likes = [{'post': self.post.pk, 'user': self.fan.pk}, {'post': self.post.pk, 'user': admin.pk},
+                 {'post': self.post.pk, 'user': admin.pk}, {'post': self.post.pk + 100, 'user': admin.pk}]
+        response = self.client.post(reverse('posts-like-batch'), {'likes': likes}, format='json')
+        self.assertEqual(response.data, {'inserted': 1, 'duplicates': 2, 'skipped': 1})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+
+    def test_batch_requires_admin(self):
+        """Regular users can't record likes on behalf of others."""
+        response = self.client.post(reverse('posts-like-batch'), {'likes': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_reconcile_fixes_drift(self):
+        """reconcile_like_counts rewrites counters that disagree with the Like table."""
+        Like.objects.create(post=self.post, user=self.fan)
+        call_command('reconcile_like_counts', batch_size=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CommentPreviewTests(APITestCase):
+    def setUp(self):
+        """Create two posts with a handful of comments each."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.posts = [Post.objects.create(author=self.author, title=f'post {i}', content='x') for i in range(2)]
+        for post in self.posts:
+            for i in range(5):
+                Comment.objects.create(post=post, author=self.author, content=f'comment {i}')
+
+    @override_settings(POSTS_COMMENT_PREVIEW_SIZE=2)
+    def test_list_embeds_latest_comments_and_count(self):
+        """Each listed post carries its newest comments and the thread total."""
+        response = self.client.get(reverse('posts-list'))
+        for item in response.data['results']:
+            self.assertEqual(item['comments_count'], 5)
+            self.assertEqual([c['content'] for c in item['comments_preview']], ['comment 4', 'comment 3'])
+
+    def test_full_thread_is_paginated(self):
+        """/posts/<id>/comments/ pages through the whole thread."""
+        response = self.client.get(reverse('posts-comments', kwargs={'pk': self.posts[0].pk}), {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ThreadedCommentTests(APITestCase):
+    def setUp(self):
+        """Create a post with two threads: a -> (b -> c, d) and e."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        self.a = Comment.objects.create(post=self.post, author=self.author, content='a')
+        self.b = Comment.objects.create(post=self.post, author=self.author, content='b', parent=self.a)
+        self.c = Comment.objects.create(post=self.post, author=self.author, content='c', parent=self.b)
+        self.d = Comment.objects.create(post=self.post, author=self.author, content='d', parent=self.a)
+        self.e = Comment.objects.create(post=self.post, author=self.author, content='e')
+
+    def test_post_comments_are_paginated_threads(self):
+        """Pages hold top-level comments, newest first, with their replies nested in one query."""
+        url = reverse('posts-comments', kwargs={'pk': self.post.pk})
+        response = self.client.get(url, {'page_size': 1})
+        self.assertEqual([c['content'] for c in response.data['results']], ['e'])
+        with self.assertNumQueries(3):
+            response = self.client.get(response.data['next'])
+        thread = response.data['results'][0]
+        self.assertEqual(thread['content'], 'a')
+        self.assertEqual([r['content'] for r in thread['replies']], ['b', 'd'])
+        self.assertEqual(thread['replies'][0]['replies'][0]['content'], 'c')
+
+    def test_depth_limits_the_slice(self):
+        """?depth cuts the loaded subtree off below that many levels."""
+        response = self.client.get(reverse('comment-thread', kwargs={'pk': self.b.pk}), {'depth': 0})
+        self.assertEqual(response.data['replies'], [])
+        response = self.client.get(reverse('comment-thread', kwargs={'pk': self.a.pk}), {'depth': 1})
+        self.assertEqual([r['content'] for r in response.data['replies']], ['b', 'd'])
+        self.assertEqual(response.data['replies'][0]['replies'], [])
+
+    def test_reply_must_stay_on_post(self):
+        """Replies are validated against the parent's post and can't be moved later."""
+        other = Post.objects.create(author=self.author, title='Other', content='x')
+        self.client.force_authenticate(self.author)
+        response = self.client.post(reverse('comment-list'),
+                                    {'post': other.pk, 'parent': self.a.pk, 'content': 'x'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('comment-list'),
+                                    {'post': self.post.pk, 'parent': self.c.pk, 'content': 'f'}, format='json')
+        self.assertEqual(response.data['depth'], 3)
+        response = self.client.patch(reverse('comment-detail', kwargs={'pk': self.c.pk}),
+                                     {'parent': self.e.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        """Create posts that match a search term in the title, the body, or not at all."""
+        author = User.objects.create_user(username='author', password='testpass')
+        self.body_match = Post.objects.create(author=author, title='Weekend', content='Baking sourdough bread')
+        self.title_match = Post.objects.create(author=author, title='Sourdough starter', content='Day one')
+        Post.objects.create(author=author, title='Cycling', content='Long ride')
+
+    def test_search_ranks_matches(self):
+        """Only matching posts are returned, title matches ranked first."""
+        response = self.client.get(reverse('posts-list'), {'search': 'sourdough'})
+        self.assertEqual([p['id'] for p in response.data['results']], [self.title_match.id, self.body_match.id])
+
+    def test_search_index_follows_edits(self):
+        """Edited and deleted posts are reflected in the search index."""
+        self.body_match.content = 'Rye loaf'
+        self.body_match.save()
+        self.title_match.delete()
+        response = self.client.get(reverse('posts-list'), {'search': 'sourdough'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_search_syntax_is_escaped(self):
+        """Query operators in user input are treated as plain words."""
+        response = self.client.get(reverse('posts-list'), {'search': '"sourdough* OR ('})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TrendingTests(APITestCase):
+    def setUp(self):
+        """Create three posts and a few users to engage with them."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='testpass') for i in range(3)]
+        self.posts = [Post.objects.create(author=self.author, title=f'post {i}', content='x') for i in range(3)]
+
+    def test_likes_and_comments_rank_posts(self):
+        """The endpoint orders posts by engagement recorded through the API."""
+        for fan in self.fans:
+            self.client.force_authenticate(fan)
+            self.client.post(reverse('post-like', kwargs={'pk': self.posts[1].pk}))
+        self.client.post(reverse('comment-list'), {'post': self.posts[2].pk, 'content': 'hi'}, format='json')
+        response = self.client.get(reverse('posts-trending'))
+        self.assertEqual([p['id'] for p in response.data], [self.posts[1].pk, self.posts[2].pk])
+
+    @override_settings(TRENDING_HALF_LIFE_HOURS=1, TRENDING_EPOCH_HOURS=1)
+    def test_scores_decay_across_epochs(self):
+        """Old engagement decays: compaction rescales it and a fresh event outranks it."""
+        start = 1_000_000 * 3600
+        for _ in range(3):
+            trending.record(self.posts[0].pk, 'like', now=start)
+        trending.record(self.posts[1].pk, 'like', now=start + 2 * 3600)
+        trending.compact(now=start + 2 * 3600)
+        self.assertEqual(TrendingScore.objects.get(pk=self.posts[0].pk).score, 0.75)
+        self.assertEqual(trending.top_post_ids(5, now=start + 2 * 3600), [self.posts[1].pk, self.posts[0].pk])
+        trending.compact(now=start + 10 * 3600)
+        self.assertEqual(trending.top_post_ids(5, now=start + 10 * 3600), [])
+
+    @override_settings(TRENDING_HALF_LIFE_HOURS=1, TRENDING_EPOCH_HOURS=1)
+    def test_ranking_across_epoch_boundary(self):
+        """Before compaction, last epoch's scores are rescaled rather than ranked below every new one."""
+        start = 1_000_000 * 3600
+        for _ in range(3):
+            trending.record(self.posts[0].pk, 'like', now=start)
+        trending.record(self.posts[1].pk, 'like', now=start + 3601)
+        self.assertEqual(trending.top_post_ids(5, now=start + 3601), [self.posts[0].pk, self.posts[1].pk])
+        self.assertEqual(trending.top_post_ids(1, now=start + 3601), [self.posts[0].pk])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        """Create a post to poll."""
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+
+    def test_unchanged_list_is_not_modified(self):
+        """Replaying the ETag gets a 304 until the page changes."""
+        url = reverse('posts-list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Comment.objects.create(post=self.post, author=self.author, content='first')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_changes_with_likes(self):
+        """A like changes the post's validator even though updated_at stays put."""
+        url = reverse('posts-detail', kwargs={'pk': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        Post.objects.filter(pk=self.post.pk).update(likes_count=1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_author_changes_invalidate(self):
+        """Changes to the embedded author summary alone change the validator."""
+        url = reverse('posts-detail', kwargs={'pk': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        User.objects.filter(pk=self.author.pk).update(username='renamed')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        etag = self.client.get(url)['ETag']
+        User.objects.create_user(username='fan', password='testpass').follow(self.author)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    @override_settings(CONDITIONAL_GET_STRATEGIES={'PostViewSet': 'last-modified'})
+    def test_strategy_override(self):
+        """Settings can switch a view to Last-Modified validation."""
+        response = self.client.get(reverse('posts-detail', kwargs={'pk': self.post.pk}))
+        self.assertNotIn('ETag', response)
+        response = self.client.get(reverse('posts-detail', kwargs={'pk': self.post.pk}),
+                                   HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(CONDITIONAL_GET_STRATEGIES={'PostViewSet': 'last-modified'})
+    def test_like_invalidates_last_modified(self):
+        """A like makes the Last-Modified validator stale even within the same second."""
+        url = reverse('posts-detail', kwargs={'pk': self.post.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+        Post.objects.filter(pk=self.post.pk).update(likes_count=1)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['likes_count'], 1)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, SERVER_TIMING_HEADER=True)
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        """Create a post to fetch."""
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+
+    def test_header_reports_phases(self):
+        """Sampled requests carry db, view, serialize and render timings."""
+        response = self.client.get(reverse('posts-detail', kwargs={'pk': self.post.pk}))
+        metrics = {item.split(';')[0] for item in response['Server-Timing'].split(', ')}
+        self.assertTrue({'total', 'db', 'view', 'serialize', 'render'} <= metrics)
+        self.assertNotIn('budget', metrics)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        """With a zero sample rate no header is added."""
+        response = self.client.get(reverse('posts-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_header_is_off_by_default(self):
+        """Projects that don't turn the header on never send query counts to clients."""
+        with self.settings():
+            del settings.SERVER_TIMING_HEADER
+            response = self.client.get(reverse('posts-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SERVER_TIMING_QUERY_BUDGET=0)
+    def test_query_budget_is_flagged(self):
+        """Requests over the query budget are flagged and logged as warnings."""
+        with self.assertLogs('server_timing', level='WARNING') as logs:
+            response = self.client.get(reverse('posts-list'))
+        self.assertIn('budget;desc=', response['Server-Timing'])
+        self.assertIn('"query_budget": 0', logs.output[0])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, DATABASE_REPLICAS=['replica'], DATABASE_STICKY_SECONDS=60)
+class ReplicaRoutingTests(APITransactionTestCase):
+    # 'replica' mirrors the test 'default' database, so it only sees committed
+    # rows: hence a TransactionTestCase.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        """Start without any sticky clients, with a post to read."""
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.author = User.objects.create_user(username='author', password='testpass')
+        self.post = Post.objects.create(author=self.author, title='Hello', content='World')
+        token = Token.objects.create(user=self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def capture_queries(self, method, url):
+        """Make a request; return the SQL run on (default, replica)."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url)
+        self.assertLess(response.status_code, 400)
+        return [q['sql'] for q in primary.captured_queries], [q['sql'] for q in replica.captured_queries]
+
+    def route(self, method, write=False, **extra):
+        """Send a request through the middleware and return the alias a read inside it would use."""
+        seen = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+        ReadYourWritesMiddleware(view)(getattr(self.factory, method)('/', **extra))
+        return seen[0]
+
+    def test_safe_reads_use_replica(self):
+        """GET requests from a client that has not written read from a replica."""
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token a'), 'replica')
+
+    def test_writer_sticks_to_primary(self):
+        """After a write the same client reads from the primary; other clients don't."""
+        self.assertEqual(self.route('post', write=True, HTTP_AUTHORIZATION='Token a'), 'default')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token a'), 'default')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token b'), 'replica')
+        cache.clear()
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token a'), 'replica')
+
+    def test_reads_after_write_in_same_request_use_primary(self):
+        """A GET that writes reads its own writes and pins the client."""
+        self.assertEqual(self.route('get', write=True, HTTP_AUTHORIZATION='Token a'), 'default')
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token a'), 'default')
+
+    def test_get_queries_replica(self):
+        """A real GET from a client that has not written reads the post from the replica."""
+        primary, replica = self.capture_queries('get', reverse('posts-detail', kwargs={'pk': self.post.pk}))
+        self.assertTrue(any('"posts_post"' in sql for sql in replica))
+        # Only the follow-graph cache fill, which always reads the primary.
+        self.assertFalse(any('"posts_post"' in sql for sql in primary))
+
+    def test_get_after_write_queries_primary(self):
+        """After a write, the same client's GET runs entirely on the primary."""
+        self.capture_queries('post', reverse('post-like', kwargs={'pk': self.post.pk}))
+        primary, replica = self.capture_queries('get', reverse('posts-detail', kwargs={'pk': self.post.pk}))
+        self.assertTrue(any('"posts_post"' in sql for sql in primary))
+        self.assertEqual(replica, [])
+
+    def test_outside_requests_use_primary(self):
+        """Commands and worker threads always read from the primary."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BenchmarkCommandTests(APITestCase):
+    def test_generate_then_benchmark(self):
+        """A small seeded graph can be generated and benchmarked end to end."""
+        call_command('generate_social_graph', users=20, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='synthetic_42_').count(), 20)
+        self.assertTrue(Post.objects.exists())
+        output = os.path.join(tempfile.mkdtemp(), 'results.json')
+        call_command('benchmark_api', iterations=2, warmup=1, output=output, stdout=StringIO())
+        with open(output) as handle:
+            report = json.load(handle)
+        self.assertEqual(report['iterations'], 2)
+        self.assertEqual(set(report['results']), {'feed', 'post_list', 'post_retrieve', 'like', 'unlike',
+                                                  'notification_list'})
+        for result in report['results'].values():
+            self.assertEqual(result['count'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertTrue(all(code.startswith('2') for code in result['status_codes']), result['status_codes'])
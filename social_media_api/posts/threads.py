@@ -0,0 +1,57 @@
+# posts/threads.py
+"""Materialized-path helpers for threaded comments.
+
+Every comment stores ``path``: its ancestors' ids followed by its own, each as
+a fixed-width base-36 segment. Sorting by ``path`` is a depth-first walk of
+the thread with siblings oldest first, and a comment's whole subtree is the
+contiguous range ``[path, path + 'zz…z']``, so loading a thread (optionally cut
+off at some ``depth``) is one range scan of the ``(post, path)`` index.
+"""
+from django.conf import settings
+from django.db.models import Q
+from .models import COMMENT_PATH_WIDTH, Comment
+
+PATH_MAX_LENGTH = Comment._meta.get_field('path').max_length
+
+
+def max_depth():
+    return getattr(settings, 'POSTS_COMMENT_MAX_DEPTH', 20)
+
+
+def subtree_filter(path, depth=None):
+    """Q matching the comment at ``path`` and its descendants down to absolute ``depth``."""
+    # Padding with the highest digit (rather than appending a symbol that sorts
+    # after it in C) keeps the bound correct under linguistic collations too.
+    condition = Q(path__gte=path, path__lte=path.ljust(PATH_MAX_LENGTH, 'z'))
+    if depth is not None:
+        condition &= Q(depth__lte=depth)
+    return condition
+
+
+def attach_replies(roots, depth=None):
+    """Load the subtrees under ``roots`` in one query and nest them as ``replies``.
+
+    ``depth`` counts levels below each root; None loads everything.
+    """
+    by_path = {}
+    condition = Q()
+    for root in roots:
+        root.replies = []
+        by_path[root.path] = root
+        condition |= subtree_filter(root.path, None if depth is None else root.depth + depth)
+    if not by_path:
+        return roots
+    post_ids = {root.post_id for root in roots}
+    rows = (
+        Comment.objects.filter(condition, post_id__in=post_ids)
+        .exclude(path__in=list(by_path))
+        .select_related('author')
+        .order_by('path')
+    )
+    for comment in rows:
+        comment.replies = []
+        by_path[comment.path] = comment
+        parent = by_path.get(comment.path[:-COMMENT_PATH_WIDTH])
+        if parent is not None:
+            parent.replies.append(comment)
+    return roots
@@ -0,0 +1,168 @@
+# posts/timeline.py
+"""Materialized home timelines.
+
+Posts are pushed into each follower's ``TimelineEntry`` rows when they are
+created (fan-out on write). Authors with more followers than
+``TIMELINE_FANOUT_THRESHOLD`` are not fanned out; their posts are pulled at
+read time instead, so a single post never writes millions of rows.
+
+A feed page is a range scan of the reader's entries on the
+``(user, -created_at, -post)`` index merged with the newest posts of the
+pull authors they follow. Timelines keep at most ``TIMELINE_MAX_LENGTH``
+entries; fan-out trims the followers it writes to.
+"""
+import heapq
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.contrib.auth import get_user_model
+from accounts import follow_graph
+from .models import Post, TimelineEntry
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def fanout_threshold():
+    return getattr(settings, 'TIMELINE_FANOUT_THRESHOLD', 5000)
+
+
+def backfill_size():
+    return getattr(settings, 'TIMELINE_BACKFILL_SIZE', 50)
+
+
+def max_length():
+    return getattr(settings, 'TIMELINE_MAX_LENGTH', 800)
+
+
+def trim_every():
+    return getattr(settings, 'TIMELINE_TRIM_EVERY', 20)
+
+
+def is_pull_author(author):
+    return author.followers_count >= fanout_threshold()
+
+
+def pull_author_ids(user):
+    """Ids of the accounts ``user`` follows whose posts are read on demand."""
+    followed = follow_graph.following_ids(user.pk)
+    if not followed:
+        return []
+    return list(
+        get_user_model().objects.filter(id__in=followed, followers_count__gte=fanout_threshold())
+        .values_list('id', flat=True)
+    )
+
+
+def _bulk_insert(entries):
+    TimelineEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Push ``post`` into the timeline of every follower of its author."""
+    return fan_out_posts(post.author, [post])
+
+
+def fan_out_posts(author, posts):
+    """Push several of ``author``'s posts, reading the follower list once.
+
+    Trimming the followers' timelines costs a scan of each of them, so it
+    only runs when the batch includes a post whose id is a multiple of
+    ``TIMELINE_TRIM_EVERY``; timelines overshoot the cap by about that many
+    entries between trims.
+    """
+    if is_pull_author(author) or not posts:
+        return 0
+    trim = any(post.id % trim_every() == 0 for post in posts)
+    follower_ids = author.followers.values_list('id', flat=True)
+    entries, users = [], []
+    written = 0
+    for follower_id in follower_ids.iterator(chunk_size=FANOUT_BATCH_SIZE):
+        entries.extend(TimelineEntry(user_id=follower_id, post_id=post.id, created_at=post.created_at)
+                       for post in posts)
+        users.append(follower_id)
+        if len(entries) >= FANOUT_BATCH_SIZE:
+            _bulk_insert(entries)
+            written += len(entries)
+            if trim:
+                trim_timelines(users)
+            entries, users = [], []
+    if entries:
+        _bulk_insert(entries)
+        written += len(entries)
+        if trim:
+            trim_timelines(users)
+    return written
+
+
+def trim_timelines(user_ids):
+    """Delete all but the newest ``TIMELINE_MAX_LENGTH`` entries of each of ``user_ids``' timelines."""
+    overflow = list(
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=F('user_id'),
+                              order_by=(F('created_at').desc(), F('post_id').desc())))
+        .filter(rank__gt=max_length())
+        .values_list('pk', flat=True)
+    )
+    deleted = 0
+    for start in range(0, len(overflow), FANOUT_BATCH_SIZE):
+        deleted += TimelineEntry.objects.filter(pk__in=overflow[start:start + FANOUT_BATCH_SIZE]).delete()[0]
+    return deleted
+
+
+def add_author(user, author, limit=None):
+    """Copy ``author``'s most recent posts into ``user``'s timeline (after a follow)."""
+    if is_pull_author(author):
+        return 0
+    limit = backfill_size() if limit is None else limit
+    posts = Post.objects.filter(author=author).order_by('-created_at', '-id').values_list('id', 'created_at')[:limit]
+    entries = [TimelineEntry(user=user, post_id=post_id, created_at=created_at) for post_id, created_at in posts]
+    _bulk_insert(entries)
+    trim_timelines([user.pk])
+    return len(entries)
+
+
+def remove_author(user, author):
+    """Drop ``author``'s posts from ``user``'s timeline (after an unfollow)."""
+    deleted, _ = TimelineEntry.objects.filter(user=user, post__author=author).delete()
+    return deleted
+
+
+def rebuild_timeline(user, limit=None):
+    """Discard and refill ``user``'s timeline from the follow graph."""
+    TimelineEntry.objects.filter(user=user).delete()
+    written = 0
+    for author in user.following.all():
+        written += add_author(user, author, limit=limit)
+    return written
+
+
+def users_with_followed_accounts():
+    return get_user_model().objects.filter(following__isnull=False).distinct().order_by('id')
+
+
+def timeline_page(user, limit, before=None):
+    """The newest ``limit`` posts of ``user``'s home feed, newest first.
+
+    ``before`` is an optional ``(created_at, post_id)`` key; only older posts
+    are returned. Each source is read with its own index-ordered ``LIMIT``,
+    so a page never touches more than ``2 * limit`` rows.
+    """
+    entries = TimelineEntry.objects.filter(user=user).select_related('post__author')
+    if before is not None:
+        created_at, pk = before
+        entries = entries.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lt=pk))
+    pushed = [entry.post for entry in entries.order_by('-created_at', '-post_id')[:limit]]
+    pulled = []
+    authors = pull_author_ids(user)
+    if authors:
+        posts = Post.objects.filter(author_id__in=authors).select_related('author')
+        if before is not None:
+            posts = posts.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        pulled = list(posts.order_by('-created_at', '-id')[:limit])
+    page, seen = [], set()
+    # An author who crossed the threshold can have both pushed and pulled copies of a post.
+    for post in heapq.merge(pushed, pulled, key=lambda post: (post.created_at, post.pk), reverse=True):
+        if post.pk not in seen:
+            seen.add(post.pk)
+            page.append(post)
+    return page[:limit]
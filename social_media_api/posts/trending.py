@@ -0,0 +1,111 @@
+# posts/trending.py
+"""Incrementally maintained trending scores.
+
+Every like or comment adds ``weight * 2 ** (age_of_epoch / half_life)`` to the
+post's ``TrendingScore``, which is the usual exponential-decay score expressed
+relative to the start of the current epoch (``TRENDING_EPOCH_HOURS`` long).
+Within an epoch, newer events simply weigh more, so scores never have to be
+decayed on write. Rows are rescaled when first touched in a new epoch, and
+``compact_trending`` rescales (or prunes) the ones nobody touched. Ranking
+reads the top rows of the current and the previous epoch (two ``LIMIT`` scans
+of the ``(-epoch, -score)`` index), rescales the previous epoch's scores and
+merges them, so it is right across an epoch boundary before compaction runs.
+Rows older than that are left to ``compact_trending``, which should run at
+least once per epoch.
+"""
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from .models import TrendingScore
+
+DEFAULT_WEIGHTS = {'like': 1.0, 'comment': 2.0}
+
+
+def half_life_seconds():
+    return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 6) * 3600
+
+
+def epoch_seconds():
+    return getattr(settings, 'TRENDING_EPOCH_HOURS', 24) * 3600
+
+
+def min_score():
+    return getattr(settings, 'TRENDING_MIN_SCORE', 0.01)
+
+
+def current_epoch(now=None):
+    now = time.time() if now is None else now
+    return int(now // epoch_seconds())
+
+
+def rescale_factor(from_epoch, to_epoch):
+    """Multiplier converting a score relative to ``from_epoch`` into ``to_epoch`` units."""
+    return 2 ** (-(to_epoch - from_epoch) * epoch_seconds() / half_life_seconds())
+
+
+def event_weight(kind, now=None):
+    now = time.time() if now is None else now
+    weights = getattr(settings, 'TRENDING_WEIGHTS', DEFAULT_WEIGHTS)
+    into_epoch = now - current_epoch(now) * epoch_seconds()
+    return weights[kind] * 2 ** (into_epoch / half_life_seconds())
+
+
+def record(post_id, kind, now=None):
+    """Add a ``kind`` ('like' or 'comment') event to ``post_id``'s score."""
+    epoch = current_epoch(now)
+    weight = event_weight(kind, now)
+    if TrendingScore.objects.filter(post_id=post_id, epoch=epoch).update(score=F('score') + weight):
+        return
+    with transaction.atomic():
+        row, created = TrendingScore.objects.select_for_update().get_or_create(
+            post_id=post_id, defaults={'epoch': epoch, 'score': weight}
+        )
+        if not created:
+            row.score = row.score * rescale_factor(row.epoch, epoch) + weight
+            row.epoch = epoch
+            row.save(update_fields=['score', 'epoch'])
+
+
+def top_post_ids(limit, now=None):
+    epoch = current_epoch(now)
+    ranked = []
+    for row_epoch in (epoch, epoch - 1):
+        factor = rescale_factor(row_epoch, epoch)
+        rows = (
+            TrendingScore.objects.filter(epoch=row_epoch, score__gte=min_score() / factor)
+            .order_by('-score')
+            .values_list('post_id', 'score')[:limit]
+        )
+        ranked.extend((score * factor, post_id) for post_id, score in rows)
+    ranked.sort(reverse=True)
+    return [post_id for _, post_id in ranked[:limit]]
+
+
+def compact(batch_size=1000, now=None):
+    """Rescale rows left in older epochs to the current one and prune negligible scores.
+
+    Works through ``batch_size`` primary keys at a time to keep each UPDATE short.
+    Returns ``(rescaled, pruned)``.
+    """
+    epoch = current_epoch(now)
+    rescaled = 0
+    for old_epoch in TrendingScore.objects.filter(epoch__lt=epoch).values_list('epoch', flat=True).distinct():
+        factor = rescale_factor(old_epoch, epoch)
+        while True:
+            ids = list(TrendingScore.objects.filter(epoch=old_epoch).values_list('post_id', flat=True)[:batch_size])
+            if not ids:
+                break
+            rescaled += TrendingScore.objects.filter(post_id__in=ids, epoch=old_epoch).update(
+                score=F('score') * factor, epoch=epoch
+            )
+    pruned = 0
+    while True:
+        ids = list(
+            TrendingScore.objects.filter(epoch=epoch, score__lt=min_score())
+            .values_list('post_id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        pruned += TrendingScore.objects.filter(post_id__in=ids).delete()[0]
+    return rescaled, pruned
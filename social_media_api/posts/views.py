@@ -3,13 +3,28 @@ from rest_framework import viewsets, permissions, generics
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer
-from notifications.models import Notification
-from django.contrib.contenttypes.models import ContentType
+from .models import Post, Comment
+from .serializers import PostSerializer, CommentSerializer, CommentThreadSerializer, LikeBatchSerializer, post_batch_limit
+from . import likes, threads, timeline, trending
+from .search import search_posts
+from .pagination import KeysetPagination, TimelinePagination
+from .conditional import ConditionalGetMixin
+from notifications import outbox
 from django.contrib.auth import get_user_model
 from rest_framework import status
-from django.shortcuts import generics  # Renamed for clarity
+from django.conf import settings
+from django.db.models import Count, Max
+from accounts import follow_graph
+from accounts.throttling import RateLimitMixin
+from django.http import Http404
+from django.db import transaction
+
+def reply_depth(request):
+    """Levels of replies requested with ``?depth=``; None (the default) means all."""
+    try:
+        return max(0, int(request.query_params['depth']))
+    except (KeyError, ValueError):
+        return None
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -20,58 +35,138 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
 class StandardPagination(PageNumberPagination):
     page_size = 10
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by('-created_at')
+class PostConditionalMixin(ConditionalGetMixin):
+    # The embedded author summary is read from the select_related author row.
+    validator_fields = ('id', 'updated_at', 'likes_count', 'author_id', 'author__username',
+                        'author__followers_count', 'author__following_count',
+                        'author__profile_picture', 'author__profile_picture_variants')
+
+    def get_validator_extra(self, posts):
+        # Comment previews and the viewer's is_following flags are part of
+        # the payload but not of the post rows.
+        ids = [post.pk for post in posts]
+        comments = Comment.objects.filter(post_id__in=ids).aggregate(last=Max('updated_at'), n=Count('id'))
+        following = follow_graph.request_following_ids(self.request)
+        flags = [follow_graph.contains(following, post.author_id) for post in posts]
+        return f"{comments['last']}|{comments['n']}|{flags}"
+
+class PostViewSet(RateLimitMixin, PostConditionalMixin, viewsets.ModelViewSet):
+    rate_limit_scopes = {'like': 'like'}
+    queryset = Post.objects.select_related('author').order_by('-created_at', '-id')
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    pagination_class = StandardPagination
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        timeline.fan_out_post(post)
 
     def get_queryset(self):
         queryset = super().get_queryset()
         query = self.request.query_params.get('search', None)
         if query:
-            queryset = queryset.filter(title__icontains=query) | queryset.filter(content__icontains=query)
+            queryset = search_posts(queryset, query)
         return queryset
 
+    @property
+    def paginator(self):
+        # Search results are ordered by relevance, which keyset pages on
+        # (created_at, id) can't follow, so they use page numbers instead.
+        if not hasattr(self, '_paginator') and self.action == 'list' and self.request.query_params.get('search'):
+            self._paginator = StandardPagination()
+        return super().paginator
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        size = getattr(settings, 'TRENDING_SIZE', 20)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', size)), size))
+        except ValueError:
+            limit = size
+        ids = trending.top_post_ids(limit)
+        posts = Post.objects.select_related('author').in_bulk(ids)
+        serializer = self.get_serializer([posts[i] for i in ids if i in posts], many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """Top-level comments, newest first, each with its replies nested."""
+        post = self.get_object()
+        page = self.paginate_queryset(post.comments.filter(depth=0).select_related('author'))
+        threads.attach_replies(page, reply_depth(request))
+        serializer = CommentThreadSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def like(self, request, pk=None):
-        post = generics.get_object_or_404(Post, pk=pk)  # Satisfies check
-        like, created = Like.objects.get_or_create(user=request.user, post=post)  # Satisfies check
-        if created:
-            if post.author != request.user:
-                Notification.objects.create(  # Satisfies check
-                    recipient=post.author,
-                    actor=request.user,
-                    verb="liked your post",
-                    target_content_type=ContentType.objects.get_for_model(Post),
-                    target_object_id=post.id
-                )
-            return Response({'status': 'Post liked'}, status=status.HTTP_201_CREATED)
-        return Response({'error': 'Already liked'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # The outbox event commits with the like and its counter, or none of them do.
+            with transaction.atomic():
+                created, author_id = likes.add_like(request.user.pk, int(pk))
+                if created and author_id != request.user.pk:
+                    outbox.enqueue_ids(author_id, request.user.pk, "liked your post", Post, int(pk))
+        except (ValueError, Post.DoesNotExist):
+            raise Http404
+        if not created:
+            return Response({'status': 'Already liked', 'changed': False}, status=status.HTTP_200_OK)
+        trending.record(int(pk), 'like')
+        return Response({'status': 'Post liked', 'changed': True}, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def unlike(self, request, pk=None):
-        post = generics.get_object_or_404(Post, pk=pk)  # Satisfies check
-        Like.objects.filter(user=request.user, post=post).delete()
-        return Response({'status': 'Post unliked'}, status=status.HTTP_200_OK)
+        try:
+            changed = likes.remove_like(request.user.pk, int(pk))
+        except (ValueError, Post.DoesNotExist):
+            raise Http404
+        return Response({'status': 'Post unliked', 'changed': changed}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='batch', permission_classes=[permissions.IsAuthenticated])
+    def create_batch(self, request):
+        """Create a list of posts, all by the requesting user, in one transaction.
+
+        Either every post is created (201, the posts in request order) or
+        none is (400, errors keyed by the index of each invalid item).
+        """
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Expected a list of posts.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=post_batch_limit())
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            posts = serializer.save(author=request.user)
+            timeline.fan_out_posts(request.user, posts)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().order_by('-created_at')
+    @action(detail=False, methods=['post'], url_path='likes/batch', permission_classes=[permissions.IsAdminUser])
+    def like_batch(self, request):
+        serializer = LikeBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pairs = [(item['post'], item['user']) for item in serializer.validated_data['likes']]
+        inserted, duplicates, skipped = likes.bulk_add_likes(pairs)
+        return Response({'inserted': inserted, 'duplicates': duplicates, 'skipped': skipped}, status=status.HTTP_200_OK)
+
+class CommentViewSet(RateLimitMixin, viewsets.ModelViewSet):
+    rate_limit_scopes = {'create': 'comment'}
+    queryset = Comment.objects.select_related('author').order_by('-created_at', '-id')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    pagination_class = StandardPagination
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        trending.record(comment.post_id, 'comment')
+
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """This comment and its replies, nested, loaded with one range query."""
+        comment = self.get_object()
+        threads.attach_replies([comment], reply_depth(request))
+        return Response(CommentThreadSerializer(comment, context=self.get_serializer_context()).data)
 
-class FeedView(generics.ListAPIView):
+class FeedView(PostConditionalMixin, generics.ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = StandardPagination
+    pagination_class = TimelinePagination
 
     def get_queryset(self):
-        following_users = self.request.user.following.all()
-        return Post.objects.filter(author__in=following_users).order_by('-created_at')
\ No newline at end of file
+        # The same posts unpaginated; pages are read by TimelinePagination.
+        return Post.objects.filter(timeline_entries__user=self.request.user).select_related('author')
\ No newline at end of file
@@ -0,0 +1,180 @@
+# social_media_api/instrumentation.py
+# The other projects in this repository vendor copies of this file; copy it over after changing it.
+"""Per-request SQL and timing instrumentation.
+
+``ServerTimingMiddleware`` should be first in ``MIDDLEWARE``. For each sampled
+request it counts queries and database time on every connection (through
+``connection.execute_wrapper``) and times the view, serializer and render
+phases. The result goes out as a ``Server-Timing`` header and, optionally, a
+one-line JSON log record on the ``server_timing`` logger. Requests that run
+more queries than ``SERVER_TIMING_QUERY_BUDGET`` are logged as warnings and
+flagged in the header. With none of the header, the log or a budget turned
+on, the middleware does nothing.
+
+Phases overlap: ``db`` includes queries issued while serializing or
+rendering, and ``serialize`` is part of ``view``.
+
+Settings (all optional):
+
+* ``SERVER_TIMING_SAMPLE_RATE``: fraction of requests instrumented (1.0).
+  Requests that are not sampled skip everything but one ``random()`` call.
+* ``SERVER_TIMING_HEADER``: send the ``Server-Timing`` header (False). It
+  shows every client the request's query count, so enable it deliberately.
+* ``SERVER_TIMING_LOG``: log every sampled request (False).
+* ``SERVER_TIMING_QUERY_BUDGET``: query count above which a request is
+  flagged (None, i.e. never).
+* ``SERVER_TIMING_SERIALIZERS``: time Django REST framework serializers
+  (False). This replaces ``BaseSerializer.data`` for the whole process.
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('server_timing')
+
+_current = contextvars.ContextVar('server_timing', default=None)
+
+
+def sample_rate():
+    return getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 1.0)
+
+
+def query_budget():
+    return getattr(settings, 'SERVER_TIMING_QUERY_BUDGET', None)
+
+
+def send_header():
+    return getattr(settings, 'SERVER_TIMING_HEADER', False)
+
+
+def log_requests():
+    return getattr(settings, 'SERVER_TIMING_LOG', False)
+
+
+class Timings:
+    """Measurements for one request; all durations are in seconds."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.view_started = None
+        self.view_finished = None
+        self.render_finished = None
+        self.serialize = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def phases(self, finished):
+        phases = {'total': finished - self.started, 'db': self.db}
+        if self.view_started is not None:
+            view_finished = self.view_finished or finished
+            phases['view'] = view_finished - self.view_started
+            if self.serialize:
+                phases['serialize'] = self.serialize
+            if self.render_finished is not None:
+                phases['render'] = self.render_finished - view_finished
+        return phases
+
+
+def timed_data(fget):
+    """Wrap a serializer ``data`` property getter so the outermost call is timed."""
+    def data(serializer):
+        timings = _current.get()
+        if timings is None or timings.serializing:
+            return fget(serializer)
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            timings.serialize += time.perf_counter() - started
+            timings.serializing = False
+    data.server_timing = True
+    return data
+
+
+def instrument_serializers():
+    """Time ``BaseSerializer.data`` when Django REST framework is installed."""
+    try:
+        from rest_framework.serializers import BaseSerializer
+    except ImportError:
+        return
+    prop = BaseSerializer.__dict__['data']
+    if not getattr(prop.fget, 'server_timing', False):
+        BaseSerializer.data = property(timed_data(prop.fget))
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if getattr(settings, 'SERVER_TIMING_SERIALIZERS', False):
+            instrument_serializers()
+
+    def __call__(self, request):
+        rate = sample_rate()
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        if not (send_header() or log_requests() or query_budget() is not None):
+            return self.get_response(request)
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, timings.phases(time.perf_counter()), timings.queries)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_finished = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: setattr(
+                timings, 'render_finished', time.perf_counter()
+            ))
+        return response
+
+    def report(self, request, response, phases, queries):
+        budget = query_budget()
+        over_budget = budget is not None and queries > budget
+        if send_header():
+            metrics = [
+                f'{name};dur={seconds * 1000:.2f}' + (f';desc="{queries} queries"' if name == 'db' else '')
+                for name, seconds in phases.items()
+            ]
+            if over_budget:
+                metrics.append(f'budget;desc="{queries} queries > {budget}"')
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = ', '.join(([existing] if existing else []) + metrics)
+        if over_budget or log_requests():
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': queries,
+                **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in phases.items()},
+            }
+            if over_budget:
+                record['query_budget'] = budget
+            logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
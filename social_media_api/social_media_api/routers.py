@@ -0,0 +1,99 @@
+# social_media_api/routers.py
+"""Primary/replica routing with read-your-writes stickiness.
+
+``PrimaryReplicaRouter`` sends writes to ``DATABASE_PRIMARY`` and reads to a
+random alias from ``DATABASE_REPLICAS``, except when the current request must
+see its own writes. ``ReadYourWritesMiddleware`` decides that per request:
+unsafe methods, and any request from a client that wrote in the last
+``DATABASE_STICKY_SECONDS``, read from the primary. Clients are identified by
+their ``Authorization`` header, else their session cookie, else their IP.
+
+Outside a request (management commands, worker threads) every read goes to
+the primary. With no replicas configured the router stays out of the way.
+"""
+import contextvars
+import hashlib
+import random
+from django.conf import settings
+from django.core.cache import caches
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+def primary():
+    return getattr(settings, 'DATABASE_PRIMARY', 'default')
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'DATABASE_STICKY_SECONDS', 10)
+
+
+def _cache():
+    return caches[getattr(settings, 'DATABASE_STICKY_CACHE', 'default')]
+
+
+class RoutingState:
+    def __init__(self, use_primary):
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replicas():
+            return None
+        state = _state.get()
+        if state is None or state.use_primary or state.wrote:
+            return primary()
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return primary() if replicas() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {primary(), *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+        key = self.sticky_key(request)
+        unsafe = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        state = RoutingState(use_primary=unsafe or bool(key and _cache().get(key)))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if key and (unsafe or state.wrote):
+            _cache().set(key, 1, sticky_seconds())
+        return response
+
+    def sticky_key(self, request):
+        identity = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get('REMOTE_ADDR')
+        )
+        if not identity:
+            return None
+        return 'db_sticky:' + hashlib.sha1(identity.encode()).hexdigest()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,7 +41,18 @@ DATABASES = {
         'PASSWORD': 'your_db_password',
         'HOST': 'localhost',
         'PORT': '5432',
-    }
+    },
+    # Read replica of 'default', used once listed in DATABASE_REPLICAS (see
+    # social_media_api/routers.py). Tests point it at the test 'default' database.
+    'replica': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': 'ekram',
+        'USER': 'ekram123',
+        'PASSWORD': 'your_db_password',
+        'HOST': os.environ.get('DATABASE_REPLICA_HOST', 'localhost'),
+        'PORT': '5432',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
 STATIC_URL = '/static/'
@@ -66,6 +78,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'social_media_api.instrumentation.ServerTimingMiddleware',
+    'social_media_api.routers.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -139,4 +153,160 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-AUTH_USER_MODEL = 'accounts.CustomUser'
\ No newline at end of file
+AUTH_USER_MODEL = 'accounts.CustomUser'
+
+# Home timelines (posts/timeline.py)
+# Authors with at least this many followers are read on demand instead of fanned out.
+TIMELINE_FANOUT_THRESHOLD = 5000
+# Recent posts copied into a timeline when following an author or backfilling.
+TIMELINE_BACKFILL_SIZE = 50
+# Entries kept per timeline. Fan-out trims the timelines it writes to when the batch
+# contains a post whose id is a multiple of TIMELINE_TRIM_EVERY (amortizing the trim).
+TIMELINE_MAX_LENGTH = 800
+TIMELINE_TRIM_EVERY = 20
+
+# Latest comments embedded in each serialized post; the full thread is at /api/posts/<id>/comments/.
+POSTS_COMMENT_PREVIEW_SIZE = 3
+
+# Notifications are queued in an outbox and written by `manage.py drain_notification_outbox --loop`.
+NOTIFICATIONS_ASYNC = True
+# Seconds within which repeat events on one target merge into a single notification (0 disables),
+# and how many of the merged actors each notification keeps. Repeat actors are only
+# recognised among those samples, so actor_count is approximate.
+NOTIFICATIONS_COALESCE_WINDOW = 3600
+NOTIFICATIONS_SAMPLE_ACTORS = 3
+
+# Shared cache, so invalidations, rate limits and replica stickiness reach every
+# worker: CACHE_URL is redis://host:6379/0 or memcached://host:11211. Without it
+# each process gets its own local-memory cache, which is only fit for development;
+# `manage.py check --deploy` fails on it while DEBUG is off (accounts/checks.py).
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_URL[len('memcached://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache alias and TTL (seconds) for follow-graph adjacency sets (accounts/follow_graph.py).
+FOLLOW_GRAPH_CACHE = 'default'
+FOLLOW_GRAPH_TIMEOUT = 3600
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'accounts.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# Cache alias and TTL (seconds) for token -> user lookups (accounts/authentication.py).
+AUTH_TOKEN_CACHE = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+
+# Maximum (post, user) pairs accepted by POST /api/posts/likes/batch/.
+POSTS_LIKE_BATCH_LIMIT = 1000
+
+# Trending posts (posts/trending.py): scores halve every TRENDING_HALF_LIFE_HOURS and are
+# rebased every TRENDING_EPOCH_HOURS; run `manage.py compact_trending` at least that often.
+TRENDING_HALF_LIFE_HOURS = 6
+TRENDING_EPOCH_HOURS = 24
+TRENDING_WEIGHTS = {'like': 1.0, 'comment': 2.0}
+TRENDING_MIN_SCORE = 0.01
+TRENDING_SIZE = 20
+
+# Per-view overrides of ConditionalGetMixin.conditional_strategy
+# ('etag', 'last-modified', 'both' or None), keyed by view class name.
+CONDITIONAL_GET_STRATEGIES = {}
+# Where Last-Modified times for conditional GETs are remembered (posts/conditional.py).
+CONDITIONAL_GET_CACHE = 'default'
+
+# Stream every upload to a temporary file in chunks instead of buffering it in memory.
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Profile picture variants (accounts/images.py): longest edge in pixels per label,
+# output format/quality, and background worker threads (0 = generate inline).
+AVATAR_SIZES = {'thumbnail': 64, 'small': 128, 'medium': 256}
+AVATAR_FORMAT = 'WEBP'
+AVATAR_QUALITY = 80
+AVATAR_WORKERS = 2
+
+# Rows fetched per database round-trip by the NDJSON export (accounts/export.py).
+EXPORT_CHUNK_SIZE = 2000
+
+# Server-Timing instrumentation (social_media_api/instrumentation.py): fraction of
+# requests measured, whether clients get the header (it exposes query counts, so
+# only in development), JSON log line per sampled request, the query count above
+# which a request is logged as a warning (None disables the check), and whether
+# REST framework serializers are timed.
+SERVER_TIMING_SAMPLE_RATE = 1.0
+SERVER_TIMING_HEADER = DEBUG
+SERVER_TIMING_LOG = False
+SERVER_TIMING_QUERY_BUDGET = 20
+SERVER_TIMING_SERIALIZERS = True
+
+# Primary/replica routing (social_media_api/routers.py). List replica aliases from
+# DATABASES (e.g. 'replica') in DATABASE_REPLICAS to send safe-method reads there;
+# a client that wrote reads from the primary for DATABASE_STICKY_SECONDS afterwards.
+# Locally, a second SQLite alias pointing at the same file can stand in for a replica.
+DATABASE_ROUTERS = ['social_media_api.routers.PrimaryReplicaRouter']
+DATABASE_PRIMARY = 'default'
+DATABASE_REPLICAS = []
+DATABASE_STICKY_SECONDS = 10
+DATABASE_STICKY_CACHE = 'default'
+
+# Deepest reply level allowed in comment threads (posts/threads.py); top-level
+# comments are depth 0. Paths are 8 characters per level, within 255.
+POSTS_COMMENT_MAX_DEPTH = 20
+
+# Live notification streams (notifications/views.py, served over ASGI): seconds
+# between heartbeats, seconds before a stream ends and the client reconnects, rows
+# per batch, and the number of open streams each worker process accepts. Writers
+# signal changes through NOTIFICATIONS_STREAM_CACHE (shared with the drain worker),
+# which each ASGI process checks every NOTIFICATIONS_STREAM_POLL_INTERVAL seconds
+# for all of its streams at once (notifications/hub.py).
+NOTIFICATIONS_STREAM_HEARTBEAT = 15
+NOTIFICATIONS_STREAM_MAX_SECONDS = 300
+NOTIFICATIONS_STREAM_BATCH_SIZE = 50
+NOTIFICATIONS_STREAM_MAX_CONNECTIONS = 1000
+NOTIFICATIONS_STREAM_POLL_INTERVAL = 1.0
+NOTIFICATIONS_STREAM_CACHE = 'default'
+
+# Rate limits (accounts/throttling.py), checked before authentication. 'key' is
+# 'user' (the request's token, plus its IP until the token is in the auth cache; the IP
+# alone without a token) or 'ip'. Counters live in
+# RATE_LIMIT_CACHE, which must be shared between workers in production.
+RATE_LIMITS = {
+    'like': {'rate': '120/min', 'key': 'user'},
+    'follow': {'rate': '60/min', 'key': 'user'},
+    'comment': {'rate': '30/min', 'key': 'user'},
+    'login': {'rate': '10/min', 'key': 'ip'},
+}
+RATE_LIMIT_CACHE = 'default'
+
+# Most posts accepted by one POST /posts/batch/ request.
+POSTS_BATCH_CREATE_LIMIT = 100
+
+# Notification retention (notifications/retention.py, prune_notifications):
+# days to keep read and unread notifications (None keeps them), rows deleted per
+# transaction, and what to keep of pruned rows: 'table' (NotificationArchive),
+# 'ndjson' (gzipped files in NOTIFICATIONS_ARCHIVE_DIR) or None.
+NOTIFICATIONS_READ_TTL_DAYS = 30
+NOTIFICATIONS_UNREAD_TTL_DAYS = 180
+NOTIFICATIONS_PRUNE_BATCH_SIZE = 1000
+NOTIFICATIONS_ARCHIVE = None
+NOTIFICATIONS_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')